@@ -0,0 +1,82 @@
+"""Поля ответов API и быстрая сериализация строк values()."""
+import json
+
+from django.core.files.storage import default_storage
+
+try:
+    # orjson в несколько раз быстрее json; он в requirements.txt,
+    # без него (другое окружение) те же байты даёт json
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj):
+    """JSON в байтах: через orjson, если он установлен."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False,
+                      separators=(',', ':')).encode()
+
+
+def isoformat(value):
+    return value.isoformat()
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class FieldSet:
+    """Поля ответа: имя в JSON -> (колонка для values(), преобразование).
+
+    ?fields=id,text выбирает подмножество, и из базы читаются
+    только нужные колонки.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def parse(self, param):
+        """Имена полей из ?fields= или все поля; ValueError на чужие."""
+        if not param:
+            return list(self.fields)
+        names = [name.strip() for name in param.split(',') if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise ValueError(
+                f'Неизвестные поля: {", ".join(unknown)}; '
+                f'доступны: {", ".join(self.fields)}')
+        return names
+
+    def columns(self, names, prefix=''):
+        return [prefix + self.fields[name][0] for name in names]
+
+    def render(self, row, names, prefix=''):
+        result = {}
+        for name in names:
+            column, convert = self.fields[name]
+            value = row[prefix + column]
+            if convert is not None and value is not None:
+                value = convert(value)
+            result[name] = value
+        return result
+
+
+POST_FIELDS = FieldSet(
+    id=('id', None),
+    text=('text', None),
+    pub_date=('pub_date', isoformat),
+    author=('author__username', None),
+    group=('group__slug', None),
+    image=('image', media_url),
+    comments_count=('comments_count', None),
+)
+
+COMMENT_FIELDS = FieldSet(
+    id=('id', None),
+    post=('post_id', None),
+    text=('text', None),
+    pub_date=('pub_date', isoformat),
+    author=('author__username', None),
+)
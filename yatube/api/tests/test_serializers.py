@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+from .. import serializers
+
+User = get_user_model()
+
+
+class DumpsTest(TestCase):
+    def test_orjson_is_installed(self):
+        '''orjson в requirements.txt: ответы кодирует он'''
+        self.assertIsNotNone(serializers.orjson)
+
+    def test_fallback_gives_same_bytes(self):
+        '''Без orjson json выдаёт те же байты'''
+        value = {'id': 1, 'text': 'Ёжик «в тумане»\n', 'group': None,
+                 'ok': True, 'tags': ['a', 2], 'pub_date':
+                 '2026-10-18T19:40:00.123456+00:00'}
+        fast = serializers.dumps(value)
+        with mock.patch.object(serializers, 'orjson', None):
+            self.assertEqual(serializers.dumps(value), fast)
+
+    def test_api_response_is_the_same_without_orjson(self):
+        author = User.objects.create_user(username='encoder')
+        group = Group.objects.create(title='Группа', slug='encoder')
+        for number in range(3):
+            Post.objects.create(author=author, group=group,
+                                text=f'Пост «{number}»')
+        client = Client()
+        url = reverse('api:post_list')
+
+        def body():
+            response = client.get(url)
+            return b''.join(response.streaming_content
+                            if response.streaming else [response.content])
+
+        fast = body()
+        self.assertIn('Пост «2»'.encode(), fast)
+        with mock.patch.object(serializers, 'orjson', None):
+            self.assertEqual(body(), fast)
@@ -0,0 +1,104 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='api_author')
+        cls.reader = User.objects.create_user(username='api_reader')
+        cls.group = Group.objects.create(title='Группа', slug='api')
+        cls.posts = [Post.objects.create(
+            author=cls.author, group=cls.group if i % 2 else None,
+            text=f'Пост {i}') for i in range(5)]
+        Comment.objects.create(post=cls.posts[0], author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+
+    def get(self, name, params=None, **kwargs):
+        response = self.client.get(reverse(f'api:{name}', kwargs=kwargs),
+                                   params)
+        body = b''.join(response.streaming_content
+                        if response.streaming else [response.content])
+        return response, json.loads(body)
+
+    def walk(self, name, limit, **kwargs):
+        seen, params = [], {'limit': limit, 'fields': 'id'}
+        while True:
+            response, data = self.get(name, params, **kwargs)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(row['id'] for row in data['results'])
+            if data['next'] is None:
+                return seen
+            params['after'] = data['next']
+
+    def test_feeds_walk_by_cursor(self):
+        '''Все ленты проходятся курсором от новых постов к старым'''
+        newest_first = [post.pk for post in reversed(self.posts)]
+        feeds = {
+            'post_list': ({}, newest_first),
+            'group_posts': ({'slug': self.group.slug},
+                            [post.pk for post in reversed(self.posts)
+                             if post.group]),
+            'author_posts': ({'username': self.author.username},
+                             newest_first),
+        }
+        for name, (kwargs, expected) in feeds.items():
+            with self.subTest(feed=name):
+                self.assertEqual(self.walk(name, 2, **kwargs), expected)
+        self.client.force_login(self.reader)
+        self.assertEqual(self.walk('follow_posts', 2), newest_first)
+
+    def test_streams_json(self):
+        response = self.client.get(reverse('api:post_list'))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_sparse_fields_select_only_columns(self):
+        '''?fields= выбирает только запрошенные колонки'''
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get('post_list', {'fields': 'id,author'})
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        select = queries[-1]['sql']
+        self.assertNotIn('"text"', select)
+        self.assertIn('"username"', select)
+
+    def test_post_detail_and_comments(self):
+        post = self.posts[0]
+        _, data = self.get('post_detail', post_id=post.pk)
+        self.assertEqual(data['text'], post.text)
+        self.assertEqual(data['author'], self.author.username)
+        self.assertEqual(data['comments_count'], 1)
+        self.assertIsNone(data['image'])
+        self.assertEqual(data['pub_date'], post.pub_date.isoformat())
+        _, data = self.get('comment_list', post_id=post.pk)
+        self.assertEqual([row['text'] for row in data['results']],
+                         ['Комментарий'])
+
+    def test_errors(self):
+        cases = (
+            ('post_list', {'fields': 'id,password'}, {}, 400),
+            ('post_list', {'limit': '0'}, {}, 400),
+            ('post_list', {'after': 'испорчен'}, {}, 400),
+            ('post_detail', None, {'post_id': 10 ** 6}, 404),
+            ('group_posts', None, {'slug': 'nope'}, 404),
+            ('follow_posts', None, {}, 401),
+        )
+        for name, params, kwargs, status in cases:
+            with self.subTest(name=name, params=params):
+                response, data = self.get(name, params, **kwargs)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('error', data)
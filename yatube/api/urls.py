@@ -0,0 +1,20 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'api'
+
+urlpatterns = [
+    # Лента всех постов
+    path('posts/', views.post_list, name='post_list'),
+    # Один пост и его комментарии
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('posts/<int:post_id>/comments/', views.comment_list,
+         name='comment_list'),
+    # Посты группы и автора
+    path('groups/<slug:slug>/posts/', views.group_posts, name='group_posts'),
+    path('authors/<str:username>/posts/', views.author_posts,
+         name='author_posts'),
+    # Лента подписок текущего пользователя
+    path('follow/', views.follow_posts, name='follow_posts'),
+]
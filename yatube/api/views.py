@@ -0,0 +1,120 @@
+"""JSON API только для чтения: ленты, пост и комментарии.
+
+Ленты берутся из тех же менеджеров, что и HTML-страницы, листаются
+курсором ?after= по ключу (pub_date, id) и отдаются потоком: строки
+читаются из базы итератором и сериализуются по одной.
+"""
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+
+from posts.feed import feed_for
+from posts.models import Comment, Group, Post, User
+from posts.utils import decode_cursor, encode_cursor, seek
+
+from .serializers import COMMENT_FIELDS, POST_FIELDS, dumps
+
+CONTENT_TYPE = 'application/json'
+
+
+def error(message, status):
+    return HttpResponse(dumps({'error': message}), status=status,
+                        content_type=CONTENT_TYPE)
+
+
+def page_size(request):
+    value = request.GET.get('limit')
+    if value is None:
+        return settings.API_PAGE_SIZE
+    if not value.isdigit() or not 0 < int(value) <= \
+            settings.API_MAX_PAGE_SIZE:
+        raise ValueError(
+            f'limit — число от 1 до {settings.API_MAX_PAGE_SIZE}')
+    return int(value)
+
+
+def stream(rows, render, keys, limit):
+    """Тело ответа {"results": [...], "next": курсор} по частям."""
+    yield b'{"results":['
+    next_cursor = last = None
+    for position, row in enumerate(rows):
+        if position == limit:
+            # лишняя строка: есть следующая страница
+            next_cursor = encode_cursor(last[key] for key in keys)
+            break
+        yield (b',' if position else b'') + dumps(render(row))
+        last = row
+    yield b'],"next":' + dumps(next_cursor) + b'}'
+
+
+def cursor_list(request, queryset, fieldset, keys=('pub_date', 'id'),
+                prefix=''):
+    """Потоковая страница queryset после курсора ?after=."""
+    try:
+        names = fieldset.parse(request.GET.get('fields'))
+        limit = page_size(request)
+    except ValueError as exc:
+        return error(str(exc), 400)
+    columns = {*fieldset.columns(names, prefix), *keys}
+    queryset = queryset.order_by(*(f'-{key}' for key in keys))
+    after = request.GET.get('after')
+    if after:
+        opts = queryset.model._meta
+        values = decode_cursor(after, [opts.get_field(key) for key in keys])
+        if values is None:
+            return error('Неверный курсор', 400)
+        queryset = queryset.filter(seek(keys, values))
+    rows = queryset.values(*columns)[:limit + 1].iterator()
+    return StreamingHttpResponse(
+        stream(rows, lambda row: fieldset.render(row, names, prefix),
+               keys, limit),
+        content_type=CONTENT_TYPE)
+
+
+def post_list(request):
+    return cursor_list(request, Post.objects, POST_FIELDS)
+
+
+def group_posts(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return error('Группа не найдена', 404)
+    return cursor_list(request, Post.objects.filter(group_id=group_id),
+                       POST_FIELDS)
+
+
+def author_posts(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return error('Автор не найден', 404)
+    return cursor_list(request, Post.objects.filter(author_id=author_id),
+                       POST_FIELDS)
+
+
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return error('Нужно войти', 401)
+    # лента разложена по FeedItem, поля поста — через post__
+    return cursor_list(request, feed_for(request.user), POST_FIELDS,
+                       keys=('pub_date', 'post_id'), prefix='post__')
+
+
+def post_detail(request, post_id):
+    try:
+        names = POST_FIELDS.parse(request.GET.get('fields'))
+    except ValueError as exc:
+        return error(str(exc), 400)
+    row = Post.objects.filter(pk=post_id).values(
+        *POST_FIELDS.columns(names)).first()
+    if row is None:
+        return error('Пост не найден', 404)
+    return HttpResponse(dumps(POST_FIELDS.render(row, names)),
+                        content_type=CONTENT_TYPE)
+
+
+def comment_list(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return error('Пост не найден', 404)
+    return cursor_list(request, Comment.objects.filter(post_id=post_id),
+                       COMMENT_FIELDS)
@@ -0,0 +1,36 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from . import tasks
+from .models import OutboxMessage, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name', 'state', 'attempts', 'run_at',
+                    'locked_until')
+    list_filter = ('state', 'name')
+    readonly_fields = ('last_error',)
+    actions = ('requeue',)
+
+    def requeue(self, request, queryset):
+        count = tasks.requeue(queryset)
+        self.message_user(request, f'Задач возвращено в очередь: {count}')
+    requeue.short_description = 'Вернуть в очередь'
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'subject', 'recipients', 'state', 'attempts',
+                    'send_after')
+    list_filter = ('state',)
+    exclude = ('message',)
+    readonly_fields = ('last_error',)
+    actions = ('requeue',)
+
+    def requeue(self, request, queryset):
+        count = queryset.update(state=OutboxMessage.PENDING, attempts=0,
+                                send_after=timezone.now(), locked_by='',
+                                locked_until=None)
+        self.message_user(request, f'Писем возвращено в очередь: {count}')
+    requeue.short_description = 'Вернуть в очередь'
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        # настройка соединений SQLite (connection_created)
+        from . import sqlite  # noqa: F401
@@ -0,0 +1,34 @@
+"""Бэкенд sqlite3 с OPTIONS['transaction_mode'], как в Django 5.1.
+
+atomic() начинает транзакцию обычным BEGIN (DEFERRED): блокировка на
+запись берётся при первой записи. Если другой запрос в это время
+пишет, транзакция, которая уже читала, не может её получить, и SQLite
+сразу отвечает «database is locked», не дожидаясь busy_timeout.
+С 'transaction_mode': 'IMMEDIATE' блокировка берётся на BEGIN, и
+писатели по очереди ждут друг друга.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'EXCLUSIVE', 'IMMEDIATE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('transaction_mode', None)
+        return params
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'transaction_mode должен быть одним из {TRANSACTION_MODES}')
+        return mode and mode.upper()
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
@@ -0,0 +1,93 @@
+"""Кэш страниц лент с защитой от «давки» (cache stampede).
+
+Запись хранит значение, время его расчёта и логический срок жизни.
+Пересчёт начинается заранее с вероятностью, растущей к концу срока
+(алгоритм XFetch), и выполняется только владельцем блокировки:
+остальные запросы в это время получают прежнюю копию. Если копии
+ещё нет, они до FEED_CACHE_WAIT секунд ждут, пока её запишет
+владелец, и только потом считают сами.
+"""
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+STATS_PREFIX = 'feedcache:stats:'
+STATS_EVENTS = ('hits', 'misses', 'rebuilds', 'stale', 'waits')
+# как часто проверять кэш, пока значение считает другой процесс
+WAIT_INTERVAL = 0.05
+
+
+def _count(event):
+    key = STATS_PREFIX + event
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    """Счётчики попаданий, промахов, пересчётов, отданных старых копий
+    и дождавшихся чужого пересчёта."""
+    values = cache.get_many([STATS_PREFIX + event
+                             for event in STATS_EVENTS])
+    return {event: values.get(STATS_PREFIX + event, 0)
+            for event in STATS_EVENTS}
+
+
+def _expires_early(delta, expires, beta):
+    # -log(u) при u из (0, 1] растёт медленно: чем дольше считается
+    # значение и чем ближе срок, тем вероятнее ранний пересчёт
+    jitter = -delta * beta * math.log(1 - random.random())
+    return time.time() + jitter >= expires
+
+
+def _wait(key, lock):
+    deadline = time.monotonic() + settings.FEED_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        # блокировку сняли без записи — владелец ничего не сохранил
+        if entry is not None or cache.get(lock) is None:
+            return entry
+    return None
+
+
+def get_or_rebuild(key, build, timeout, beta=None):
+    """Значение key из кэша или результат build() с записью в кэш."""
+    if beta is None:
+        beta = settings.FEED_CACHE_BETA
+    entry = cache.get(key)
+    if entry is not None:
+        value, delta, expires = entry
+        if not _expires_early(delta, expires, beta):
+            _count('hits')
+            return value
+    lock = f'{key}:lock'
+    owner = cache.add(lock, 1, settings.FEED_CACHE_LOCK_TIMEOUT)
+    if not owner and entry is not None:
+        # пересчитывает другой процесс, отдаём старую копию
+        _count('stale')
+        return entry[0]
+    if not owner:
+        # копии нет: ждём ту, что считает владелец блокировки
+        entry = _wait(key, lock)
+        if entry is not None:
+            _count('waits')
+            return entry[0]
+    _count('misses' if entry is None else 'rebuilds')
+    try:
+        started = time.time()
+        value = build()
+        delta = time.time() - started
+        # физически храним дольше срока, чтобы было что отдать
+        # конкурентам, пока идёт пересчёт
+        cache.set(key, (value, delta, time.time() + timeout),
+                  timeout + settings.FEED_CACHE_GRACE)
+    finally:
+        if owner:
+            cache.delete(lock)
+    return value
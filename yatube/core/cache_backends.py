@@ -0,0 +1,246 @@
+"""Кэш в файле SQLite (режим WAL), общий для всех воркеров на хосте.
+
+Подключение:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache_backends.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024},
+        }
+    }
+
+Целые числа хранятся как INTEGER, поэтому incr/decr выполняются
+одним UPDATE без гонок между процессами. Время последнего чтения
+обновляется не чаще раза в LRU_RESOLUTION секунд, так что чтение
+почти никогда не превращается в запись. При превышении MAX_SIZE
+(байт) или MAX_ENTRIES вытесняются давно не читанные записи.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL,'
+    ' size INTEGER NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+)
+# срок NULL — «вечная» запись
+ALIVE = '(expires IS NULL OR expires > ?)'
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        # у BaseCache по умолчанию всего 300 записей — для общего кэша мало
+        self._max_entries = int(options.get('MAX_ENTRIES', 100000))
+        self._max_size = int(options.get('MAX_SIZE', 64 * 1024 * 1024))
+        self._cull_every = int(options.get('CULL_EVERY', 100))
+        self._lru_resolution = float(options.get('LRU_RESOLUTION', 30))
+        self._busy_timeout = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+        self._writes = 0
+
+    # соединения -----------------------------------------------------------
+
+    @property
+    def _db(self):
+        # своё соединение на поток; после fork — новое
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            db = sqlite3.connect(self._path, timeout=self._busy_timeout,
+                                 isolation_level=None,
+                                 check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db, self._local.pid = db, pid
+        return self._local.db
+
+    def close(self, **kwargs):
+        # соединение живёт весь процесс: между запросами его не закрываем
+        pass
+
+    # упаковка значений ----------------------------------------------------
+
+    def _dump(self, value):
+        if type(value) is int and -2 ** 63 <= value < 2 ** 63:
+            return value
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @staticmethod
+    def _load(raw):
+        if isinstance(raw, int):
+            return raw
+        return pickle.loads(raw)
+
+    @staticmethod
+    def _size(raw):
+        return 8 if isinstance(raw, int) else len(raw)
+
+    # операции -------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {}
+        for key in keys:
+            cache_key = self.make_key(key, version=version)
+            self.validate_key(cache_key)
+            key_map[cache_key] = key
+        if not key_map:
+            return {}
+        now = time.time()
+        marks = ','.join('?' * len(key_map))
+        rows = self._db.execute(
+            f'SELECT key, value, accessed FROM cache '
+            f'WHERE key IN ({marks}) AND {ALIVE}',
+            (*key_map, now)).fetchall()
+        stale = [row[0] for row in rows
+                 if now - row[2] > self._lru_resolution]
+        if stale:
+            self._db.execute(
+                f'UPDATE cache SET accessed = ? '
+                f'WHERE key IN ({",".join("?" * len(stale))})',
+                (now, *stale))
+        return {key_map[key]: self._load(value) for key, value, _ in rows}
+
+    def _write(self, mode, items, timeout):
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        rows = []
+        for key, value in items:
+            raw = self._dump(value)
+            rows.append((key, raw, expires, now, self._size(raw)))
+        db = self._db
+        if mode == 'add':
+            # занятый, но просроченный ключ add() может перезаписать
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                written = 0
+                for row in rows:
+                    db.execute(f'DELETE FROM cache WHERE key = ? AND NOT '
+                               f'{ALIVE}', (row[0], now))
+                    written += db.execute(
+                        'INSERT OR IGNORE INTO cache VALUES (?, ?, ?, ?, ?)',
+                        row).rowcount
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+        else:
+            db.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)', rows)
+            written = len(rows)
+        self._writes += 1
+        if self._writes % self._cull_every == 0:
+            self._cull()
+        return written
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self._write('add', [(key, value)], timeout))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        self._write('set', [(key, value)], timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        items = []
+        for key, value in data.items():
+            key = self.make_key(key, version=version)
+            self.validate_key(key)
+            items.append((key, value))
+        if items:
+            self._write('set', items, timeout)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return bool(self._db.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {ALIVE}',
+            (self.get_backend_timeout(timeout), key, time.time())).rowcount)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        db = self._db
+        # UPDATE и SELECT в одной транзакции: атомарно между процессами
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            updated = db.execute(
+                f'UPDATE cache SET value = value + ? WHERE key = ? '
+                f"AND typeof(value) = 'integer' AND {ALIVE}",
+                (delta, key, time.time())).rowcount
+            row = db.execute('SELECT value FROM cache WHERE key = ?',
+                             (key,)).fetchone()
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        if not updated:
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def has_key(self, key, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {ALIVE}',
+            (key, time.time())).fetchone() is not None
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_key(key, version=version) for key in keys]
+        for key in keys:
+            self.validate_key(key)
+        if keys:
+            marks = ','.join('?' * len(keys))
+            self._db.execute(f'DELETE FROM cache WHERE key IN ({marks})',
+                             keys)
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    # вытеснение -----------------------------------------------------------
+
+    def _cull(self):
+        """Удаляет просроченное, затем давно не читанное сверх лимитов."""
+        db = self._db
+        db.execute(f'DELETE FROM cache WHERE NOT {ALIVE}', (time.time(),))
+        entries, size = db.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache').fetchone()
+        if entries <= self._max_entries and size <= self._max_size:
+            return
+        # вытесняем с запасом, как Django: 1/CULL_FREQUENCY записей
+        excess = max(entries - self._max_entries,
+                     entries // self._cull_frequency, 1)
+        db.execute(
+            'DELETE FROM cache WHERE key IN '
+            '(SELECT key FROM cache ORDER BY accessed LIMIT ?)', (excess,))
+        if size > self._max_size:
+            # по размеру: снимаем самые старые, пока не влезем в лимит
+            db.execute(
+                'DELETE FROM cache WHERE key IN (SELECT key FROM '
+                '(SELECT key, SUM(size) OVER (ORDER BY accessed DESC) '
+                'AS total FROM cache) WHERE total > ?)', (self._max_size,))
@@ -0,0 +1,93 @@
+"""Чтение с реплик и запись в основную БД (DATABASE_ROUTERS).
+
+View, помеченные @replica_reads, читают с одной из DATABASE_REPLICAS
+(на весь запрос выбирается одна); всё остальное и любая запись идут
+в default. Если запрос что-то записал, StickyPrimaryMiddleware ставит
+cookie, и следующие REPLICA_STICKY_SECONDS секунд запросы этого
+посетителя читают из default: свой новый пост или комментарий он
+увидит, даже если реплика ещё отстаёт. Чужие изменения реплика
+покажет с задержкой, но отстающая страница не выдаёт себя за новую:
+версии для ETag и ключа кэша страницы (posts.versions) читаются с
+той же реплики, что и сама страница, и после синхронизации у неё
+новый ETag. Числа постов лент, посчитанные на реплике, в кэш не
+попадают (reading_replica).
+
+Для разработки реплика — копия файла SQLite, которую обновляет
+manage.py sync_replicas (copy_database), задержка — период копирования.
+"""
+import functools
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from django.conf import settings
+
+COOKIE_NAME = 'primary_until'
+
+_state = threading.local()
+
+
+def _primary_until(request):
+    try:
+        return float(request.COOKIES.get(COOKIE_NAME, 0))
+    except ValueError:
+        return 0
+
+
+def replica_reads(view):
+    """Чтение в view — с реплики, если посетитель недавно не писал."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.DATABASE_REPLICAS
+                or _primary_until(request) > time.time()):
+            return view(request, *args, **kwargs)
+        _state.replica = random.choice(settings.DATABASE_REPLICAS)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _state.replica = None
+    return wrapper
+
+
+def reset():
+    _state.replica = None
+    _state.wrote = False
+
+
+def wrote():
+    """Писал ли текущий запрос в БД."""
+    return getattr(_state, 'wrote', False)
+
+
+def reading_replica():
+    """Читает ли текущий запрос с реплики."""
+    return bool(getattr(_state, 'replica', None)) and not wrote()
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # после записи в этом же запросе реплика её ещё не видит
+        if not reading_replica():
+            return 'default'
+        return _state.replica
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # реплики — копии default, объекты из них совместимы
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # схема попадает на реплики вместе с данными
+        return db not in settings.DATABASE_REPLICAS
+
+
+def copy_database(source, target):
+    """Согласованная копия файла SQLite (backup API) поверх target."""
+    with closing(sqlite3.connect(source)) as origin, \
+            closing(sqlite3.connect(target)) as replica:
+        origin.backup(replica)
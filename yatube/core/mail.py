@@ -0,0 +1,149 @@
+"""Исходящие письма: view только записывает письмо, отправляет воркер.
+
+EMAIL_BACKEND = 'core.mail.OutboxBackend' сохраняет письма в таблицу
+(core.models.OutboxMessage) и ставит фоновую задачу deliver. Она
+отправляет все накопившиеся письма через OUTBOX_EMAIL_BACKEND (SMTP
+или filebased для разработки) по одному соединению, не быстрее
+OUTBOX_RATE писем в секунду. Предел действует внутри одной задачи:
+воркер с --threads 4 может выполнять четыре deliver сразу и
+отправлять до 4 × OUTBOX_RATE писем в секунду. Письмо, которое не
+ушло, повторяется с той же задержкой, что и задачи (tasks.backoff):
+пока в очереди есть письма, deliver ставит следующую deliver на
+время ближайшего из них. После OUTBOX_MAX_ATTEMPTS попыток письмо
+остаётся в таблице в состоянии failed. Без воркера очередь
+отправляет manage.py send_outbox.
+"""
+import logging
+import pickle
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import Min, Q
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from . import tasks
+from .models import OutboxMessage, Task
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Почтовый бэкенд, который только кладёт письма в очередь."""
+
+    def send_messages(self, email_messages):
+        items = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            # соединение не сериализуется, а отправлять будет другое
+            message.connection = None
+            items.append(OutboxMessage(
+                subject=message.subject[:255],
+                recipients=', '.join(message.recipients()),
+                message=pickle.dumps(message)))
+        if items:
+            OutboxMessage.objects.bulk_create(items)
+            deliver.delay()
+        return len(items)
+
+
+def _claim(limit):
+    """Берёт пакет писем в аренду; возвращает их в порядке очереди."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = OutboxMessage.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        state=OutboxMessage.PENDING, send_after__lte=now)
+    ids = list(due.order_by('send_after', 'pk')
+               .values_list('pk', flat=True)[:limit])
+    # письма, которые успел взять другой отправитель, не обновятся
+    due.filter(pk__in=ids).update(
+        locked_by=token,
+        locked_until=now + timedelta(seconds=settings.TASK_LEASE))
+    return list(OutboxMessage.objects.filter(locked_by=token,
+                                             locked_until__gt=now)
+                .order_by('send_after', 'pk'))
+
+
+def _failed(item, error):
+    attempts = item.attempts + 1
+    queued = OutboxMessage.objects.filter(pk=item.pk)
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error('Письмо %s не отправлено за %s попыток: %s',
+                     item.pk, attempts, error)
+        queued.update(state=OutboxMessage.FAILED, attempts=attempts,
+                      locked_by='', locked_until=None, last_error=error)
+        return
+    logger.warning('Письмо %s не отправлено: %s', item.pk, error)
+    queued.update(
+        attempts=attempts, locked_by='', locked_until=None,
+        last_error=error,
+        send_after=timezone.now() + timedelta(
+            seconds=tasks.backoff(attempts)))
+
+
+def _schedule_next():
+    """Ставит deliver на время, когда можно будет взять ближайшее письмо.
+
+    Не ставит, если в очереди уже есть deliver, которую ещё никто
+    не выполняет (текущая задача в аренде и не считается).
+    """
+    now = timezone.now()
+    if Task.objects.filter(
+            Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+            name=deliver.task_name, state=Task.PENDING).exists():
+        return
+    # письмо в чужой аренде освободится не раньше её конца
+    ready = OutboxMessage.objects.filter(
+        state=OutboxMessage.PENDING,
+    ).aggregate(at=Min(Greatest(
+        'send_after', Coalesce('locked_until', 'send_after'))))['at']
+    if ready is not None:
+        tasks.enqueue(deliver,
+                      countdown=max((ready - now).total_seconds(), 0))
+
+
+def _send(limit):
+    items = _claim(limit)
+    if not items:
+        return 0, 0
+    sent = failed = 0
+    interval = 1 / settings.OUTBOX_RATE if settings.OUTBOX_RATE else 0
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        for item in items:
+            _failed(item, repr(error))
+        return 0, len(items)
+    try:
+        next_send = time.monotonic()
+        for item in items:
+            pause = next_send - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            next_send = time.monotonic() + interval
+            try:
+                connection.send_messages([pickle.loads(item.message)])
+            except Exception as error:
+                _failed(item, repr(error))
+                failed += 1
+                continue
+            OutboxMessage.objects.filter(pk=item.pk).delete()
+            sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+@tasks.task()
+def deliver(limit=None):
+    """Отправляет пакет писем; возвращает (отправлено, не отправлено)."""
+    result = _send(limit or settings.OUTBOX_BATCH_SIZE)
+    _schedule_next()
+    return result
@@ -0,0 +1,97 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import SQLiteCache
+
+
+def make_backends(directory):
+    return {
+        'locmem': lambda: LocMemCache('bench', {
+            'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+        'filebased': lambda: FileBasedCache(
+            os.path.join(directory, 'files'),
+            {'OPTIONS': {'MAX_ENTRIES': 10 ** 6}}),
+        'sqlite': lambda: SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), {}),
+    }
+
+
+def shared_worker(factory, keys, rounds, queue):
+    # каждый воркер читает общий набор ключей и досчитывает промахи
+    cache = factory()
+    hits = 0
+    for _ in range(rounds):
+        for key in keys:
+            if cache.get(key) is None:
+                cache.set(key, key * 10)
+            else:
+                hits += 1
+    queue.put(hits)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает SQLiteCache с LocMemCache и FileBasedCache: '
+            'скорость операций и общий hit rate нескольких процессов')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ops', type=int, default=5000)
+        parser.add_argument('--processes', type=int, default=4)
+
+    def timed(self, name, ops, action):
+        started = time.perf_counter()
+        action()
+        elapsed = time.perf_counter() - started
+        return f'{name} {ops / elapsed:>10.0f} оп/с'
+
+    def bench_ops(self, cache, ops):
+        payload = 'x' * 1024
+        keys = [f'key:{i}' for i in range(ops)]
+        cache.set('counter', 0)
+        return [
+            self.timed('set     ', ops,
+                       lambda: [cache.set(k, payload) for k in keys]),
+            self.timed('get     ', ops, lambda: [cache.get(k) for k in keys]),
+            self.timed('get_many', ops, lambda: [
+                cache.get_many(keys[i:i + 10]) for i in range(0, ops, 10)]),
+            self.timed('incr    ', ops,
+                       lambda: [cache.incr('counter') for _ in keys]),
+        ]
+
+    def shared_hit_rate(self, factory, processes):
+        keys = [f'shared:{i}' for i in range(200)]
+        rounds = 5
+        factory().clear()
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [context.Process(target=shared_worker,
+                                   args=(factory, keys, rounds, queue))
+                   for _ in range(processes)]
+        for worker in workers:
+            worker.start()
+        hits = sum(queue.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+        return hits / (len(keys) * rounds * processes)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        try:
+            for name, factory in make_backends(directory).items():
+                cache = factory()
+                cache.clear()
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                for line in self.bench_ops(cache, options['ops']):
+                    self.stdout.write(f'  {line}')
+                rate = self.shared_hit_rate(factory, options['processes'])
+                self.stdout.write(
+                    f'  hit rate на {options["processes"]} процессах: '
+                    f'{rate:.1%}')
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.sqlite import apply_pragmas
+
+# до: настройки SQLite и Django по умолчанию — журнал DELETE, BEGIN
+# DEFERRED, новое соединение на каждый запрос (CONN_MAX_AGE = 0);
+# после: SQLITE_PRAGMAS, BEGIN IMMEDIATE и постоянное соединение
+PROFILES = {
+    'до': {'pragmas': {'journal_mode': 'DELETE'}, 'begin': 'BEGIN',
+           'persistent': False},
+    'после': {'pragmas': None, 'begin': 'BEGIN IMMEDIATE',
+              'persistent': True},
+}
+SCHEMA = '''
+CREATE TABLE post (id INTEGER PRIMARY KEY, text TEXT, pub_date REAL,
+                   comments_count INTEGER NOT NULL DEFAULT 0);
+CREATE INDEX post_pub_date ON post (pub_date);
+CREATE TABLE comment (id INTEGER PRIMARY KEY, post_id INTEGER, text TEXT,
+                      created REAL);
+CREATE INDEX comment_post ON comment (post_id, created);
+'''
+POSTS = 2000
+
+
+def prepare(path, pragmas):
+    with sqlite3.connect(path) as connection:
+        apply_pragmas(connection, pragmas)
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            'INSERT INTO post (text, pub_date) VALUES (?, ?)',
+            [('x' * 400, number) for number in range(POSTS)])
+    connection.close()
+
+
+def connect(path, profile):
+    connection = sqlite3.connect(path, isolation_level=None)
+    apply_pragmas(connection, profile['pragmas'])
+    return connection
+
+
+def read(connection, rng):
+    # страница ленты и страница поста с комментариями
+    connection.execute('SELECT id, text, comments_count FROM post '
+                       'ORDER BY pub_date DESC LIMIT 10').fetchall()
+    connection.execute('SELECT text FROM comment WHERE post_id = ? '
+                       'ORDER BY created LIMIT 20',
+                       (rng.randrange(POSTS),)).fetchall()
+
+
+def write(connection, rng, begin):
+    # как add_comment: в транзакции сначала чтение, потом запись
+    post_id = rng.randrange(POSTS)
+    connection.execute(begin)
+    try:
+        connection.execute('SELECT id FROM post WHERE id = ?',
+                           (post_id,)).fetchone()
+        connection.execute('INSERT INTO comment (post_id, text, created) '
+                           'VALUES (?, ?, ?)', (post_id, 'y' * 100,
+                                                time.time()))
+        connection.execute('UPDATE post SET comments_count = '
+                           'comments_count + 1 WHERE id = ?', (post_id,))
+        connection.execute('COMMIT')
+    except sqlite3.OperationalError:
+        connection.execute('ROLLBACK')
+        raise
+
+
+def worker(path, profile, writes, duration, seed, queue):
+    rng = random.Random(seed)
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    connection = connect(path, profile) if profile['persistent'] else None
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        current = connection or connect(path, profile)
+        try:
+            if rng.random() < writes:
+                write(current, rng, profile['begin'])
+                counts['writes'] += 1
+            else:
+                read(current, rng)
+                counts['reads'] += 1
+        except sqlite3.OperationalError:
+            counts['errors'] += 1
+        finally:
+            if connection is None:
+                current.close()
+    queue.put(counts)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность SQLite на смеси чтения '
+            'и записи до и после настроек core.sqlite')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5)
+        parser.add_argument('--writes', type=float, default=0.2,
+                            help='доля записей в смеси')
+
+    def run(self, directory, name, profile, options):
+        path = os.path.join(directory, f'{len(os.listdir(directory))}.db')
+        prepare(path, profile['pragmas'])
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        workers = [context.Process(target=worker, args=(
+            path, profile, options['writes'], options['duration'],
+            number, queue)) for number in range(options['processes'])]
+        for process in workers:
+            process.start()
+        results = [queue.get() for _ in workers]
+        for process in workers:
+            process.join()
+        totals = {key: sum(result[key] for result in results)
+                  for key in ('reads', 'writes', 'errors')}
+        duration = options['duration']
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        self.stdout.write(
+            f'  чтение {totals["reads"] / duration:>10.0f} оп/с')
+        self.stdout.write(
+            f'  запись {totals["writes"] / duration:>10.0f} оп/с')
+        self.stdout.write(
+            f'  ошибки {totals["errors"]:>10} (database is locked)')
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        try:
+            for name, profile in PROFILES.items():
+                profile = dict(profile)
+                if profile['pragmas'] is None:
+                    profile['pragmas'] = settings.SQLITE_PRAGMAS
+                self.run(directory, name, profile, options)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,12 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.cache import stats
+
+
+class Command(BaseCommand):
+    help = 'Выводит счётчики кэша страниц лент в формате JSON'
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(stats()))
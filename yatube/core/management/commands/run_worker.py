@@ -0,0 +1,74 @@
+import multiprocessing
+import signal
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from core import tasks
+
+
+def _init_process():
+    # соединения с БД унаследованы от родителя: не закрываем их,
+    # а просто забываем, чтобы процесс открыл свои
+    for connection in connections.all():
+        connection.connection = None
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди core.tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='потоков (по умолчанию 4)')
+        parser.add_argument('--processes', type=int, default=0,
+                            help='процессов вместо потоков')
+        parser.add_argument('--batch', type=int, default=50,
+                            help='сколько задач брать за один опрос')
+        parser.add_argument('--poll', type=float, default=1.0,
+                            help='пауза, когда очередь пуста (с)')
+        parser.add_argument('--once', action='store_true',
+                            help='выйти, когда очередь опустеет')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        if options['processes']:
+            connections.close_all()
+            pool = ProcessPoolExecutor(
+                options['processes'],
+                mp_context=multiprocessing.get_context('fork'),
+                initializer=_init_process)
+        else:
+            pool = ThreadPoolExecutor(options['threads'])
+        results = Counter()
+        with pool:
+            try:
+                while not self.stopping:
+                    try:
+                        results[tasks.DEAD] += tasks.expire()
+                        ids = tasks.due(options['batch'])
+                    except DatabaseError as error:
+                        self.stderr.write(f'Очередь недоступна: {error}')
+                        time.sleep(options['poll'])
+                        continue
+                    if not ids:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll'])
+                        continue
+                    # задачи пакета дорабатывают и при остановке
+                    results.update(pool.map(tasks.run, ids))
+            except KeyboardInterrupt:
+                pass
+        results.pop(None, None)
+        self.stdout.write(self.style.SUCCESS(
+            'Задач выполнено: {done}, отложено: {retry}, '
+            'не выполнено: {dead}, сбоев очереди: {error}'.format(
+                done=results[tasks.DONE], retry=results[tasks.RETRY],
+                dead=results[tasks.DEAD], error=results[tasks.ERROR])))
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди исходящих'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='писем на одно соединение')
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = mail.deliver(options['batch_size'])
+            if not sent and not failed:
+                break
+            total_sent += sent
+            total_failed += failed
+        self.stdout.write(self.style.SUCCESS(
+            f'Писем отправлено: {total_sent}, не отправлено: '
+            f'{total_failed}'))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import sqlite
+
+
+class Command(BaseCommand):
+    help = ('Обслуживание SQLite: ANALYZE, PRAGMA optimize, возврат '
+            'свободных страниц и checkpoint WAL')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vacuum', action='store_true',
+                            help='полный VACUUM: нужен один раз, чтобы '
+                                 'включить auto_vacuum=INCREMENTAL')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Команда только для SQLite')
+        with connection.cursor() as cursor:
+            before = sqlite.stats(cursor)
+            checkpoint = sqlite.maintain(cursor, vacuum=options['vacuum'])
+            after = sqlite.stats(cursor)
+        size = before['page_size']
+        self.stdout.write(
+            f'Режим журнала: {after["journal_mode"]}, auto_vacuum: '
+            f'{after["auto_vacuum"]}')
+        self.stdout.write(
+            f'Размер: {before["page_count"] * size // 1024} КиБ → '
+            f'{after["page_count"] * size // 1024} КиБ, свободных страниц: '
+            f'{before["freelist_count"]} → {after["freelist_count"]}')
+        self.stdout.write(self.style.SUCCESS(
+            f'WAL: перенесено страниц {checkpoint["checkpointed_pages"]}'
+            f' из {checkpoint["wal_pages"]}'
+            + (', checkpoint не завершён: БД занята'
+               if checkpoint['checkpoint_busy'] else '')))
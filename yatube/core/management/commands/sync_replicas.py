@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.db import copy_database
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную БД SQLite в реплики: замена репликации '
+            'для разработки, период копирования — задержка реплик')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='копировать каждые N секунд; '
+                                 '0 — один раз')
+
+    def handle(self, *args, **options):
+        paths = []
+        for alias in ['default'] + list(settings.DATABASE_REPLICAS):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias}: поддерживается только SQLite')
+            paths.append(connections[alias].settings_dict['NAME'])
+        source, replicas = paths[0], paths[1:]
+        if not replicas:
+            raise CommandError('DATABASE_REPLICAS пуст')
+        while True:
+            for target in replicas:
+                copy_database(source, target)
+            self.stdout.write(f'Реплик обновлено: {len(replicas)}')
+            if not options['interval']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
@@ -0,0 +1,176 @@
+"""Заголовок Server-Timing для каждого ответа.
+
+Время запроса раскладывается на view, запросы к БД, рендеринг
+шаблонов и обращения к кэшу; браузер показывает его во вкладке
+Network без debug toolbar и DEBUG. БД замеряется через
+execute_wrapper, шаблоны и кэш — обёртками методов бэкендов, которые
+ставятся один раз и без активного замера просто вызывают оригинал.
+Доля PROFILE_SAMPLE_RATE запросов дополнительно профилируется
+(core.profiler), стеки пишутся в PROFILE_DIR.
+"""
+import functools
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from . import db, profiler
+
+logger = logging.getLogger(__name__)
+
+CACHE_METHODS = ('get', 'get_many', 'set', 'set_many', 'add', 'delete',
+                 'delete_many', 'incr', 'decr', 'touch', 'has_key',
+                 'get_or_set', 'clear')
+# бэкенды шаблонов, чей render() замеряется (Jinja2 — если установлен)
+TEMPLATE_CLASSES = ('django.template.backends.django.Template',
+                    'django.template.backends.jinja2.Template')
+
+_local = threading.local()
+_installed = False
+
+
+class Timings:
+    """Суммарное время и число вызовов по видам за один запрос."""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.view_started = None
+        self._depth = defaultdict(int)
+
+    def measure(self, kind, call, *args, **kwargs):
+        # вложенные вызовы (include, get внутри get_or_set) не
+        # считаются второй раз
+        if self._depth[kind]:
+            return call(*args, **kwargs)
+        self._depth[kind] += 1
+        started = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self._depth[kind] -= 1
+            self.durations[kind] += time.perf_counter() - started
+            self.counts[kind] += 1
+
+    def header(self):
+        entries = []
+        for kind in ('total', 'view', 'db', 'tpl', 'cache'):
+            if kind not in self.durations:
+                continue
+            entry = f'{kind};dur={self.durations[kind] * 1000:.1f}'
+            if kind in ('db', 'cache'):
+                entry += f';desc="{self.counts[kind]} calls"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+def _timed(kind, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        timings = getattr(_local, 'timings', None)
+        if timings is None:
+            return method(*args, **kwargs)
+        return timings.measure(kind, method, *args, **kwargs)
+    wrapper.server_timing = True
+    return wrapper
+
+
+def _wrap(cls, kind, names):
+    for name in names:
+        method = getattr(cls, name, None)
+        if method is not None and not getattr(method, 'server_timing',
+                                              False):
+            setattr(cls, name, _timed(kind, method))
+
+
+def install():
+    """Оборачивает render() шаблонов и методы бэкендов кэша."""
+    global _installed
+    if _installed:
+        return
+    for path in TEMPLATE_CLASSES:
+        try:
+            _wrap(import_string(path), 'tpl', ('render',))
+        except ImportError:
+            continue
+    for alias in settings.CACHES:
+        _wrap(type(caches[alias]), 'cache', CACHE_METHODS)
+    _installed = True
+
+
+def _query(execute, sql, params, many, context):
+    return _local.timings.measure('db', execute, sql, params, many, context)
+
+
+class ServerTimingMiddleware:
+    """Ставить первым в MIDDLEWARE: total включает всё остальное."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        if not settings.SERVER_TIMING:
+            return self.get_response(request)
+        sampler = None
+        if random.random() < settings.PROFILE_SAMPLE_RATE:
+            sampler = profiler.Sampler(threading.get_ident(),
+                                       settings.PROFILE_INTERVAL).start()
+        timings = _local.timings = Timings()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_query))
+                response = self.get_response(request)
+        finally:
+            _local.timings = None
+            finished = time.perf_counter()
+            if sampler is not None:
+                self._dump(sampler.stop(), request)
+        timings.durations['total'] = finished - started
+        if timings.view_started is not None:
+            timings.durations['view'] = finished - timings.view_started
+        response['Server-Timing'] = timings.header()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    @staticmethod
+    def _dump(stacks, request):
+        if not stacks:
+            return
+        try:
+            profiler.dump(stacks, settings.PROFILE_DIR,
+                          f'{request.method}-{request.path}')
+        except OSError:
+            logger.exception('Не удалось сохранить профиль запроса')
+
+
+class StickyPrimaryMiddleware:
+    """После записи посетитель какое-то время читает из основной БД."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        db.reset()
+        response = self.get_response(request)
+        if db.wrote() and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                db.COOKIE_NAME,
+                f'{time.time() + settings.REPLICA_STICKY_SECONDS:.3f}',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+                samesite='Lax')
+        db.reset()
+        return response
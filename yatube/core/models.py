@@ -1,5 +1,6 @@
 # core/models.py
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -12,3 +13,65 @@ class CreatedModel(models.Model):
     class Meta:
         # Это абстрактная модель:
         abstract = True
+
+
+class Task(models.Model):
+    """Задача фоновой очереди (core.tasks); выполненные удаляются."""
+    PENDING = 'pending'
+    DEAD = 'dead'
+    STATES = ((PENDING, 'Ожидает'), (DEAD, 'Не выполнена'))
+
+    name = models.CharField('Функция', max_length=200)
+    # JSON: {"args": [...], "kwargs": {...}}
+    payload = models.TextField('Аргументы', default='{}')
+    state = models.CharField('Состояние', max_length=10, choices=STATES,
+                             default=PENDING)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Наибольшее число попыток')
+    run_at = models.DateTimeField('Выполнить не раньше', default=timezone.now)
+    # пока срок не вышел, задачу выполняет один воркер; если он упал,
+    # задачу после срока возьмёт другой
+    locked_until = models.DateTimeField('Занята до', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [models.Index(fields=('state', 'run_at'),
+                                name='task_state_run_at_idx')]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ждущее отправки (core.mail); отправленные удаляются."""
+    PENDING = 'pending'
+    FAILED = 'failed'
+    STATES = ((PENDING, 'Ожидает'), (FAILED, 'Не отправлено'))
+
+    subject = models.CharField('Тема', max_length=255)
+    recipients = models.TextField('Получатели')
+    # EmailMessage целиком (pickle): с вложениями и HTML-версией
+    message = models.BinaryField('Письмо')
+    state = models.CharField('Состояние', max_length=10, choices=STATES,
+                             default=PENDING)
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    send_after = models.DateTimeField('Отправить не раньше',
+                                      default=timezone.now)
+    # пакет отправителя, который взял письмо, и срок, до которого
+    # его не возьмёт другой
+    locked_by = models.CharField(max_length=32, blank=True)
+    locked_until = models.DateTimeField('Занято до', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [models.Index(fields=('state', 'send_after'),
+                                name='outbox_state_send_after_idx')]
+
+    def __str__(self):
+        return f'{self.subject} → {self.recipients}'
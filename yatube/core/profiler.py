@@ -0,0 +1,67 @@
+"""Статистический профайлер запроса для flamegraph.
+
+Отдельный поток раз в PROFILE_INTERVAL секунд снимает стек потока,
+который обрабатывает запрос (sys._current_frames), и считает
+одинаковые стеки. Результат сохраняется в формате «collapsed stacks»
+(кадры через «;», в конце число снимков), который понимают
+flamegraph.pl и speedscope. Сигналы (SIGPROF) не подходят: их
+получает только главный поток, а запросы WSGI-сервер обрабатывает
+в других.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def collapse(frame):
+    """Стек от внешнего кадра к внутреннему одной строкой."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{code.co_name} ({code.co_filename}:'
+                     f'{code.co_firstlineno})'.replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler:
+    """Снимает стеки потока thread_id, пока не вызван stop()."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            self.stacks[collapse(frame)] += 1
+
+
+def dump(stacks, directory, label):
+    """Сохраняет стеки в файл .folded и возвращает его путь."""
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r'\W+', '-', label).strip('-')[:60] or 'root'
+    path = os.path.join(
+        directory,
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{slug}.folded')
+    with open(path, 'w', encoding='utf-8') as output:
+        for stack, count in stacks.most_common():
+            output.write(f'{stack} {count}\n')
+    return path
@@ -0,0 +1,64 @@
+"""Настройка соединений SQLite под нагрузку (SQLITE_PRAGMAS).
+
+Каждое новое соединение получает прагмы из настроек: журнал WAL
+(читатели не ждут писателя, писатель — читателей), synchronous=NORMAL
+(в режиме WAL это надёжно при падении процесса, fsync — только на
+checkpoint), busy_timeout (писатель ждёт блокировку, а не сразу
+получает «database is locked»), кэш страниц и mmap. Вместе с
+CONN_MAX_AGE соединение и его кэш переживают запрос.
+
+Обслуживание — manage.py sqlite_maintenance (maintain), сравнение
+с настройками SQLite по умолчанию — manage.py bench_sqlite.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def configure(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        apply_pragmas(cursor, settings.SQLITE_PRAGMAS)
+
+
+def _pragma(cursor, name):
+    cursor.execute(f'PRAGMA {name}')
+    return cursor.fetchone()[0]
+
+
+def stats(cursor):
+    """Размер файла в страницах, свободные страницы и режимы."""
+    return {name: _pragma(cursor, name)
+            for name in ('page_count', 'freelist_count', 'page_size',
+                         'journal_mode', 'auto_vacuum')}
+
+
+def maintain(cursor, vacuum=False):
+    """ANALYZE, optimize, возврат свободных страниц и checkpoint WAL.
+
+    auto_vacuum=INCREMENTAL действует только после полного VACUUM:
+    vacuum=True выполняет его (файл переписывается целиком, на это
+    время БД заблокирована).
+    """
+    cursor.execute('ANALYZE')
+    cursor.execute('PRAGMA optimize')
+    if vacuum:
+        cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        cursor.execute('VACUUM')
+    cursor.execute('PRAGMA incremental_vacuum')
+    cursor.fetchall()
+    # TRUNCATE отчитывается уже об обрезанном журнале: сколько в нём
+    # было страниц, показывает PASSIVE перед ним
+    cursor.execute('PRAGMA wal_checkpoint(PASSIVE)')
+    _, log, checkpointed = cursor.fetchone()
+    cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    busy = cursor.fetchone()[0]
+    return {'checkpoint_busy': busy, 'wal_pages': log,
+            'checkpointed_pages': checkpointed}
@@ -0,0 +1,170 @@
+"""Фоновые задачи в таблице БД (core.models.Task), без брокера.
+
+Функция-задача помечается декоратором @task, а ставится в очередь
+вызовом func.delay(...). Строка задачи вставляется в текущей
+транзакции: если запрос откатится, задачи не будет, а после коммита
+она уже сохранена и не потеряется, даже если процесс упадёт сразу
+после ответа. Выполняет задачи команда run_worker.
+
+Воркер берёт задачу условным UPDATE с арендой (locked_until), так что
+одну задачу не выполнят двое, а задачу упавшего воркера после срока
+аренды возьмёт другой. Выполненная задача удаляется. Ошибка —
+повтор с экспоненциальной задержкой; после max_attempts попыток
+задача остаётся в таблице в состоянии dead с последней ошибкой,
+её можно перезапустить из админки. Если воркер умер посреди
+последней попытки (OOM, segfault), задачу после срока аренды
+переводит в dead expire(). Сбой самой очереди (например,
+БД заблокирована) пишется в лог и не останавливает воркер: задачу
+возьмут снова, когда истечёт аренда.
+"""
+import json
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# итог run(); ERROR — сбой очереди, а не задачи
+DONE, RETRY, DEAD, ERROR = 'done', 'retry', 'dead', 'error'
+
+
+def task(max_attempts=None):
+    """Декоратор: функция остаётся обычной и получает .delay()."""
+    def decorator(func):
+        func.task_name = f'{func.__module__}.{func.__qualname__}'
+        func.max_attempts = max_attempts
+
+        def delay(*args, **kwargs):
+            return enqueue(func, args, kwargs)
+        func.delay = delay
+        return func
+    return decorator
+
+
+def enqueue(func, args=(), kwargs=None, countdown=0):
+    """Сохраняет задачу; при TASKS_EAGER выполняет её после коммита."""
+    item = Task.objects.create(
+        name=func.task_name,
+        payload=json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        max_attempts=func.max_attempts or settings.TASK_MAX_ATTEMPTS,
+        run_at=timezone.now() + timedelta(seconds=countdown))
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: run(item.pk))
+    return item
+
+
+def resolve(name):
+    """Функция задачи по имени; только помеченные @task."""
+    func = import_string(name)
+    if getattr(func, 'task_name', None) != name:
+        raise ImportError(f'{name} не помечена как задача')
+    return func
+
+
+def backoff(attempts):
+    """Задержка перед следующей попыткой (с), со случайным разбросом."""
+    delay = min(settings.TASK_RETRY_DELAY * 2 ** (attempts - 1),
+                settings.TASK_RETRY_MAX_DELAY)
+    return delay * random.uniform(1, 1.25)
+
+
+def _claimable(now):
+    # попытки считает claim(); если воркер упал вместе с задачей,
+    # исчерпавшая их задача больше не выдаётся
+    return ((Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            & Q(attempts__lt=F('max_attempts')))
+
+
+def due(limit):
+    """id задач, которые пора выполнить и никто не выполняет."""
+    now = timezone.now()
+    return list(Task.objects.filter(
+        _claimable(now), state=Task.PENDING, run_at__lte=now,
+    ).order_by('run_at').values_list('pk', flat=True)[:limit])
+
+
+def expire():
+    """Переводит в dead задачи, чья последняя попытка не завершилась.
+
+    Аренда такой задачи истекла, а попыток больше нет: воркер упал,
+    не успев записать итог. Возвращает число задач.
+    """
+    expired = Task.objects.filter(
+        state=Task.PENDING, locked_until__lt=timezone.now(),
+        attempts__gte=F('max_attempts'),
+    ).update(state=Task.DEAD, locked_until=None,
+             last_error='Аренда истекла: воркер не завершил '
+                        'последнюю попытку')
+    if expired:
+        logger.error('Задач без итога последней попытки: %s', expired)
+    return expired
+
+
+def claim(task_id):
+    """Берёт задачу в аренду; None, если её уже взял другой воркер."""
+    now = timezone.now()
+    claimed = Task.objects.filter(
+        _claimable(now), pk=task_id, state=Task.PENDING, run_at__lte=now,
+    ).update(locked_until=now + timedelta(seconds=settings.TASK_LEASE),
+             attempts=F('attempts') + 1)
+    if not claimed:
+        return None
+    return Task.objects.get(pk=task_id)
+
+
+def run(task_id):
+    """Выполняет одну задачу; DONE, RETRY, DEAD или None, если занята.
+
+    ERROR — задача не выполнялась или её итог не записан из-за сбоя
+    очереди; исключение только пишется в лог.
+    """
+    close_old_connections()
+    try:
+        return _run(task_id)
+    except Exception:
+        logger.exception('Сбой очереди на задаче %s', task_id)
+        return ERROR
+    finally:
+        close_old_connections()
+
+
+def _run(task_id):
+    item = claim(task_id)
+    if item is None:
+        return None
+    try:
+        payload = json.loads(item.payload)
+        resolve(item.name)(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        queued = Task.objects.filter(pk=item.pk)
+        if item.attempts >= item.max_attempts:
+            logger.error('Задача %s не выполнена за %s попыток:\n%s',
+                         item, item.attempts, error)
+            queued.update(state=Task.DEAD, locked_until=None,
+                          last_error=error)
+            return DEAD
+        logger.warning('Задача %s упала, попытка %s из %s:\n%s',
+                       item, item.attempts, item.max_attempts, error)
+        queued.update(
+            run_at=timezone.now() + timedelta(
+                seconds=backoff(item.attempts)),
+            locked_until=None, last_error=error)
+        return RETRY
+    Task.objects.filter(pk=item.pk).delete()
+    return DONE
+
+
+def requeue(queryset):
+    """Возвращает задачи (обычно dead) в очередь с нулём попыток."""
+    return queryset.update(state=Task.PENDING, attempts=0,
+                           run_at=timezone.now(), locked_until=None)
@@ -0,0 +1,117 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Group, Post
+from core.cache import get_or_rebuild, stats
+
+User = get_user_model()
+
+
+class FeedCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_hit_miss_and_stats(self):
+        build = mock.Mock(return_value='страница')
+        self.assertEqual(get_or_rebuild('k', build, 20), 'страница')
+        self.assertEqual(get_or_rebuild('k', build, 20), 'страница')
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(stats(), {'hits': 1, 'misses': 1,
+                                   'rebuilds': 0, 'stale': 0, 'waits': 0})
+
+    def test_expired_entry_is_rebuilt_by_lock_owner_only(self):
+        '''Пока один пересчитывает, остальные получают старую копию'''
+        cache.set('k', ('старая', 0.5, time.time() - 1), 60)
+        cache.add('k:lock', 1)
+        build = mock.Mock(return_value='новая')
+        self.assertEqual(get_or_rebuild('k', build, 20), 'старая')
+        build.assert_not_called()
+        cache.delete('k:lock')
+        self.assertEqual(get_or_rebuild('k', build, 20), 'новая')
+        self.assertIsNone(cache.get('k:lock'))
+        self.assertEqual(stats()['stale'], 1)
+        self.assertEqual(stats()['rebuilds'], 1)
+
+    def test_cold_miss_waits_for_lock_owner(self):
+        '''Без копии конкурент ждёт значение владельца блокировки'''
+        cache.add('k:lock', 1)
+        build = mock.Mock(return_value='своя')
+
+        def sleep(seconds):
+            cache.set('k', ('чужая', 0.5, time.time() + 20), 60)
+
+        with mock.patch('core.cache.time.sleep', side_effect=sleep):
+            self.assertEqual(get_or_rebuild('k', build, 20), 'чужая')
+        build.assert_not_called()
+        self.assertEqual(stats()['waits'], 1)
+
+    @override_settings(FEED_CACHE_WAIT=0.2)
+    def test_cold_miss_builds_after_waiting(self):
+        '''Владелец не успел или ничего не записал — считаем сами'''
+        cache.add('k:lock', 1)
+        self.assertEqual(get_or_rebuild('k', lambda: 'своя', 20), 'своя')
+        self.assertEqual(cache.get('k:lock'), 1)
+        cache.delete('k')
+        with mock.patch('core.cache.time.sleep',
+                        side_effect=lambda seconds: cache.delete('k:lock')
+                        ) as sleep:
+            self.assertEqual(get_or_rebuild('k', lambda: 'своя', 20),
+                             'своя')
+        sleep.assert_called_once()
+        self.assertEqual(stats()['waits'], 0)
+
+    @override_settings(FEED_CACHE_BETA=1e9)
+    def test_early_expiration(self):
+        '''Долгий пересчёт с большим beta запускается до срока'''
+        cache.set('k', ('старая', 1.0, time.time() + 10), 60)
+        self.assertEqual(get_or_rebuild('k', lambda: 'новая', 20), 'новая')
+
+    def test_index_pages_are_cached_separately(self):
+        '''Ключ кэша главной учитывает номер страницы и курсор'''
+        user = User.objects.create_user(username='cached')
+        for i in range(12):
+            Post.objects.create(author=user, text=f'Пост номер {i}')
+        client = Client()
+        first = client.get(reverse('posts:index'))
+        after = first.context['page_obj'].next_cursor
+        pages = (client.get(reverse('posts:index'), {'after': after}),
+                 client.get(reverse('posts:index'), {'page': 2}))
+        for page in pages:
+            self.assertNotEqual(page.content, first.content)
+            self.assertContains(page, 'Пост номер 0')
+
+    def test_cached_page_skips_view(self):
+        '''Повторный запрос той же версии страницы не идёт в БД
+        за постами, а новый пост меняет ключ'''
+        user = User.objects.create_user(username='cached')
+        group = Group.objects.create(title='Группа', slug='cached',
+                                     description='Описание')
+        Post.objects.create(author=user, group=group, text='Первый пост')
+        client = Client(REMOTE_ADDR='192.0.2.1')
+        for url in (reverse('posts:index'),
+                    reverse('posts:group_list', args=[group.slug]),
+                    reverse('posts:profile', args=[user.username])):
+            with self.subTest(url=url):
+                first = client.get(url)
+                # остаётся только запрос версий для ETag
+                with self.assertNumQueries(1):
+                    second = client.get(url)
+                self.assertEqual(second.content, first.content)
+                self.assertEqual(second['ETag'], first['ETag'])
+        Post.objects.create(author=user, group=group, text='Второй пост')
+        self.assertContains(client.get(reverse('posts:index')),
+                            'Второй пост')
+
+    def test_error_pages_are_not_cached(self):
+        '''404 отдаётся как есть и не попадает в кэш'''
+        client = Client(REMOTE_ADDR='192.0.2.1')
+        url = reverse('posts:group_list', args=['missing'])
+        self.assertEqual(client.get(url).status_code, 404)
+        Group.objects.create(title='Группа', slug='missing',
+                             description='Описание')
+        self.assertEqual(client.get(url).status_code, 200)
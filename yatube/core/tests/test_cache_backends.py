@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTest(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.sqlite3')
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        self.cache.set('пост', {'text': 'Текст'})
+        self.assertEqual(self.cache.get('пост'), {'text': 'Текст'})
+        self.assertFalse(self.cache.add('пост', 'другое'))
+        self.assertTrue(self.cache.add('новый', 1))
+        self.cache.set_many({'a': 1, 'b': [2]})
+        self.assertEqual(self.cache.get_many(['a', 'b', 'нет']),
+                         {'a': 1, 'b': [2]})
+        self.cache.delete_many(['a', 'b'])
+        self.assertIsNone(self.cache.get('a'))
+        self.assertTrue(self.cache.has_key('пост'))
+        self.cache.clear()
+        self.assertFalse(self.cache.has_key('пост'))
+
+    def test_timeouts(self):
+        self.cache.set('короткий', 1, timeout=0.05)
+        self.cache.set('вечный', 1, timeout=None)
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('короткий'))
+        self.assertTrue(self.cache.add('короткий', 2))
+        self.assertEqual(self.cache.get('короткий'), 2)
+        self.assertEqual(self.cache.get('вечный'), 1)
+
+    def test_shared_between_instances(self):
+        '''Второй экземпляр (другой процесс) видит те же данные'''
+        self.cache.set('общий', 'значение')
+        other = self.make_cache()
+        self.assertEqual(other.get('общий'), 'значение')
+        other.delete('общий')
+        self.assertIsNone(self.cache.get('общий'))
+
+    def test_incr_is_atomic(self):
+        self.cache.set('счётчик', 0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+        def work():
+            cache = self.make_cache()
+            for _ in range(50):
+                cache.incr('счётчик')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('счётчик'), 200)
+        self.assertEqual(self.cache.decr('счётчик', 10), 190)
+
+    def test_lru_eviction_by_size(self):
+        '''При превышении MAX_SIZE вытесняются давно не читанные'''
+        cache = self.make_cache(MAX_SIZE=3500, CULL_EVERY=1,
+                                LRU_RESOLUTION=0)
+        cache.set('старый', b'x' * 1000)
+        cache.set('читаемый', b'x' * 1000)
+        time.sleep(0.01)
+        cache.get('читаемый')
+        cache.set('новый', b'x' * 1000)
+        cache.set('ещё', b'x' * 1000)
+        self.assertIsNone(cache.get('старый'))
+        self.assertIsNotNone(cache.get('читаемый'))
+        self.assertIsNotNone(cache.get('ещё'))
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import closing
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import db
+from core.middleware import StickyPrimaryMiddleware
+from posts.models import Post
+
+User = get_user_model()
+router = db.PrimaryReplicaRouter()
+
+
+@db.replica_reads
+def read_view(request):
+    return HttpResponse(router.db_for_read(Post))
+
+
+def write_view(request):
+    User.objects.create_user('writer')
+    return HttpResponse(router.db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'],
+                   REPLICA_STICKY_SECONDS=5)
+class RouterTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, view, request):
+        return StickyPrimaryMiddleware(view)(request)
+
+    def test_marked_view_reads_replica(self):
+        '''Помеченная view читает с реплики, остальные — из default'''
+        response = self.call(read_view, self.factory.get('/'))
+        self.assertEqual(response.content, b'replica')
+        self.assertEqual(router.db_for_read(Post), 'default')
+        self.assertEqual(router.db_for_write(Post), 'default')
+
+    def test_write_sets_sticky_cookie(self):
+        '''После записи посетитель читает из default'''
+        response = self.call(write_view, self.factory.post('/'))
+        # в том же запросе — уже из default
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies[db.COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertGreater(float(cookie.value), time.time())
+        request = self.factory.get('/')
+        request.COOKIES[db.COOKIE_NAME] = cookie.value
+        self.assertEqual(self.call(read_view, request).content, b'default')
+
+    def test_expired_cookie_reads_replica(self):
+        request = self.factory.get('/')
+        request.COOKIES[db.COOKIE_NAME] = str(time.time() - 1)
+        self.assertEqual(self.call(read_view, request).content, b'replica')
+
+    def test_no_cookie_without_writes(self):
+        response = self.call(read_view, self.factory.get('/'))
+        self.assertNotIn(db.COOKIE_NAME, response.cookies)
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(router.allow_migrate('replica', 'posts'))
+        self.assertTrue(router.allow_migrate('default', 'posts'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        response = self.call(write_view, self.factory.get('/'))
+        self.assertNotIn(db.COOKIE_NAME, response.cookies)
+        self.assertEqual(self.call(read_view, self.factory.get('/')).content,
+                         b'default')
+
+
+class CopyDatabaseTest(TestCase):
+    def test_copy_replaces_replica(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'primary.sqlite3')
+            target = os.path.join(directory, 'replica.sqlite3')
+            with closing(sqlite3.connect(source)) as primary:
+                primary.execute('CREATE TABLE item (name TEXT)')
+                primary.execute("INSERT INTO item VALUES ('первая')")
+                primary.commit()
+                db.copy_database(source, target)
+                primary.execute("INSERT INTO item VALUES ('вторая')")
+                primary.commit()
+                with closing(sqlite3.connect(target)) as replica:
+                    # до следующего копирования реплика отстаёт
+                    self.assertEqual(replica.execute(
+                        'SELECT count(*) FROM item').fetchone(), (1,))
+                db.copy_database(source, target)
+                with closing(sqlite3.connect(target)) as replica:
+                    self.assertEqual(replica.execute(
+                        'SELECT count(*) FROM item').fetchone(), (2,))
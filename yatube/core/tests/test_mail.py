@@ -0,0 +1,143 @@
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import tasks
+from core.mail import deliver
+from core.models import OutboxMessage, Task
+
+User = get_user_model()
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('сервер недоступен')
+
+
+class ClosedBackend(EmailBackend):
+    def open(self):
+        raise ConnectionRefusedError('нет соединения')
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    OUTBOX_RATE=0, OUTBOX_MAX_ATTEMPTS=2)
+class OutboxTest(TestCase):
+    def send(self, count=1):
+        for number in range(count):
+            mail.send_mail(f'Письмо {number}', 'Текст', 'site@yatube.ru',
+                           [f'user{number}@yatube.ru'])
+
+    def test_password_reset_is_queued(self):
+        '''Сброс пароля только ставит письмо в очередь'''
+        User.objects.create_user('reader', 'reader@yatube.ru', 'secret')
+        Client().post(reverse('password_reset'),
+                      {'email': 'reader@yatube.ru'})
+        self.assertEqual(mail.outbox, [])
+        item = OutboxMessage.objects.get()
+        self.assertEqual(item.recipients, 'reader@yatube.ru')
+        self.assertTrue(Task.objects.filter(
+            name='core.mail.deliver').exists())
+        self.assertEqual(tasks.run(Task.objects.get().pk), tasks.DONE)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Сброс пароля на testserver')
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='core.tests.test_mail.'
+                                            'CountingBackend')
+    def test_batch_uses_one_connection(self):
+        '''Пакет писем уходит по одному соединению'''
+        self.send(3)
+        CountingBackend.opened = 0
+        self.assertEqual(deliver(), (3, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(OUTBOX_RATE=20)
+    def test_rate_limit(self):
+        self.send(3)
+        started = time.monotonic()
+        deliver()
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='core.tests.test_mail.'
+                                            'FailingBackend')
+    def test_retry_then_failed(self):
+        '''Неотправленное письмо откладывается, потом помечается failed'''
+        self.send()
+        self.assertEqual(deliver(), (0, 1))
+        item = OutboxMessage.objects.get()
+        self.assertEqual(item.attempts, 1)
+        self.assertEqual(item.state, OutboxMessage.PENDING)
+        self.assertIn('сервер недоступен', item.last_error)
+        # пока задержка не вышла, письмо не берут
+        self.assertEqual(deliver(), (0, 0))
+        OutboxMessage.objects.update(send_after=item.created)
+        deliver()
+        self.assertEqual(OutboxMessage.objects.get().state,
+                         OutboxMessage.FAILED)
+
+    def run_due(self):
+        for task_id in tasks.due(10):
+            tasks.run(task_id)
+
+    def test_failed_message_is_retried_by_queued_task(self):
+        '''Отложенное письмо отправляет задача, поставленная deliver'''
+        with self.settings(OUTBOX_EMAIL_BACKEND='core.tests.test_mail.'
+                                                'FailingBackend'):
+            self.send()
+            self.run_due()
+            # повторный запуск без писем к отправке не плодит задачи
+            deliver()
+        item = OutboxMessage.objects.get()
+        retry = Task.objects.get(name='core.mail.deliver')
+        self.assertLess(abs(retry.run_at - item.send_after),
+                        timedelta(seconds=1))
+        self.assertEqual(tasks.due(10), [])
+        past = timezone.now() - timedelta(seconds=1)
+        OutboxMessage.objects.update(send_after=past)
+        Task.objects.update(run_at=past)
+        self.run_due()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertFalse(Task.objects.exists())
+
+    def test_batch_limit_schedules_the_rest(self):
+        '''Письма сверх пакета отправит следующая задача'''
+        self.send(3)
+        Task.objects.all().delete()
+        self.assertEqual(deliver(2), (2, 0))
+        self.run_due()
+        self.assertEqual(len(mail.outbox), 3)
+
+    @override_settings(OUTBOX_EMAIL_BACKEND='core.tests.test_mail.'
+                                            'ClosedBackend')
+    def test_connection_error_retries_batch(self):
+        self.send(2)
+        self.assertEqual(deliver(), (0, 2))
+        self.assertEqual(
+            set(OutboxMessage.objects.values_list('attempts', flat=True)),
+            {1})
+
+    def test_command_drains_queue(self):
+        self.send(5)
+        output = StringIO()
+        call_command('send_outbox', '--batch-size', '2', stdout=output)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn('отправлено: 5', output.getvalue())
@@ -0,0 +1,83 @@
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiler
+
+ENTRY = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+class ServerTimingTest(TestCase):
+    def setUp(self):
+        # страница из кэша не рендерит шаблонов
+        cache.clear()
+        self.client = Client()
+
+    def timings(self, response):
+        return {name: float(value) for name, value
+                in ENTRY.findall(response['Server-Timing'])}
+
+    def test_header_splits_request_time(self):
+        '''Время запроса разложено на view, БД, шаблоны и кэш'''
+        response = self.client.get(reverse('posts:index'))
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'total', 'view', 'db', 'tpl',
+                                        'cache'})
+        self.assertLessEqual(timings['view'], timings['total'])
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc='
+                                                    r'"\d+ calls"')
+
+    @override_settings(SERVER_TIMING=False)
+    def test_can_be_disabled(self):
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_sampled_request_is_profiled(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # без кэша страниц, чтобы запросу было что сэмплировать
+        with override_settings(PROFILE_SAMPLE_RATE=1.0,
+                               PROFILE_INTERVAL=0.0005,
+                               PROFILE_DIR=directory,
+                               PAGE_CACHE_TIMEOUT=0):
+            for _ in range(20):
+                self.client.get(reverse('posts:index'))
+        files = os.listdir(directory)
+        self.assertTrue(files)
+        self.assertTrue(all(name.endswith('.folded') for name in files))
+        with open(os.path.join(directory, files[0]),
+                  encoding='utf-8') as profile:
+            self.assertRegex(profile.readline(), r'^\S.*;.* \d+$')
+
+
+class SamplerTest(TestCase):
+    def test_collapsed_stacks_of_busy_thread(self):
+        '''Стек идёт от внешнего кадра к внутреннему'''
+        def busy_loop():
+            finish = time.perf_counter() + 0.1
+            while time.perf_counter() < finish:
+                pass
+
+        worker = threading.Thread(target=busy_loop)
+        worker.start()
+        stacks = profiler.Sampler(worker.ident, 0.001).start()
+        worker.join()
+        stacks = stacks.stop()
+        self.assertTrue(stacks)
+        stack = stacks.most_common(1)[0][0]
+        self.assertTrue(stack.startswith('_bootstrap ('))
+        self.assertIn(';busy_loop (', stack)
+
+    def test_collapse_current_frame(self):
+        stack = profiler.collapse(sys._getframe())
+        self.assertTrue(stack.endswith(
+            f'test_collapse_current_frame ({__file__}:'
+            f'{self.test_collapse_current_frame.__code__.co_firstlineno})'))
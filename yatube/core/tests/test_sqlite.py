@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from core import sqlite
+
+
+def pragma(name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class PragmasTest(TestCase):
+    def test_new_connection_gets_pragmas(self):
+        '''Прагмы SQLITE_PRAGMAS ставятся при открытии соединения'''
+        with self.settings(SQLITE_PRAGMAS={'busy_timeout': 1234,
+                                           'cache_size': -4000}):
+            sqlite.configure(sender=None, connection=connection)
+            self.assertEqual(pragma('busy_timeout'), 1234)
+            self.assertEqual(pragma('cache_size'), -4000)
+        with connection.cursor() as cursor:
+            sqlite.apply_pragmas(cursor, {
+                name: settings.SQLITE_PRAGMAS[name]
+                for name in ('busy_timeout', 'cache_size')})
+
+    def test_test_connection_is_configured(self):
+        # тестовая БД открыта уже с прагмами из настроек
+        self.assertEqual(pragma('busy_timeout'), 5000)
+        # synchronous=NORMAL
+        self.assertEqual(pragma('synchronous'), 1)
+
+    def test_bench(self):
+        output = StringIO()
+        call_command('bench_sqlite', '--processes', '2', '--duration',
+                     '0.2', stdout=output)
+        self.assertIn('после', output.getvalue())
+
+
+class MaintenanceTest(TransactionTestCase):
+    def test_maintenance_command(self):
+        # ANALYZE и checkpoint — вне транзакции теста
+        output = StringIO()
+        call_command('sqlite_maintenance', stdout=output)
+        self.assertIn('WAL:', output.getvalue())
+
+
+class TransactionModeTest(TransactionTestCase):
+    def test_atomic_begins_immediate(self):
+        '''atomic() сразу берёт блокировку на запись'''
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                pass
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_unknown_mode(self):
+        options = connection.settings_dict['OPTIONS']
+        mode = options['transaction_mode']
+        options['transaction_mode'] = 'LAZY'
+        try:
+            with self.assertRaises(ImproperlyConfigured):
+                connection.transaction_mode
+        finally:
+            options['transaction_mode'] = mode
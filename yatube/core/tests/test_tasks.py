@@ -0,0 +1,202 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+
+calls = []
+
+
+@tasks.task()
+def remember(value, suffix=''):
+    calls.append(f'{value}{suffix}')
+
+
+@tasks.task(max_attempts=2)
+def fail():
+    raise ValueError('сломалось')
+
+
+def plain():
+    pass
+
+
+class TasksTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delay_stores_task(self):
+        '''delay() сохраняет имя функции и аргументы, но не выполняет'''
+        item = remember.delay(1, suffix='!')
+        self.assertEqual(item.name, 'core.tests.test_tasks.remember')
+        self.assertEqual(item.state, Task.PENDING)
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run(item.pk), tasks.DONE)
+        self.assertEqual(calls, ['1!'])
+        self.assertFalse(Task.objects.exists())
+
+    def test_rolled_back_task_is_lost(self):
+        '''Задача из откатившейся транзакции не сохраняется'''
+        try:
+            with transaction.atomic():
+                remember.delay(1)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(Task.objects.exists())
+
+    def test_retry_with_backoff(self):
+        '''Ошибка откладывает задачу и сохраняет traceback'''
+        item = fail.delay()
+        started = timezone.now()
+        self.assertEqual(tasks.run(item.pk), tasks.RETRY)
+        item.refresh_from_db()
+        self.assertEqual(item.attempts, 1)
+        self.assertIsNone(item.locked_until)
+        self.assertIn('ValueError: сломалось', item.last_error)
+        self.assertGreaterEqual(item.run_at, started + timedelta(seconds=10))
+        # пока задержка не вышла, задачу не берут
+        self.assertEqual(tasks.due(10), [])
+        self.assertIsNone(tasks.run(item.pk))
+
+    def test_dead_after_max_attempts(self):
+        '''После max_attempts задача остаётся в состоянии dead'''
+        item = fail.delay()
+        tasks.run(item.pk)
+        Task.objects.filter(pk=item.pk).update(run_at=timezone.now())
+        self.assertEqual(tasks.run(item.pk), tasks.DEAD)
+        item.refresh_from_db()
+        self.assertEqual(item.state, Task.DEAD)
+        self.assertEqual(tasks.due(10), [])
+        tasks.requeue(Task.objects.filter(pk=item.pk))
+        self.assertEqual(tasks.due(10), [item.pk])
+
+    def test_backoff_grows_up_to_limit(self):
+        with self.settings(TASK_RETRY_DELAY=10, TASK_RETRY_MAX_DELAY=60):
+            self.assertTrue(10 <= tasks.backoff(1) <= 12.5)
+            self.assertTrue(40 <= tasks.backoff(3) <= 50)
+            self.assertTrue(60 <= tasks.backoff(10) <= 75)
+
+    def test_leased_task_is_not_claimed_twice(self):
+        '''Задачу в аренде не берут, пока аренда не истекла'''
+        item = remember.delay(1)
+        self.assertIsNotNone(tasks.claim(item.pk))
+        self.assertIsNone(tasks.claim(item.pk))
+        self.assertEqual(tasks.due(10), [])
+        Task.objects.filter(pk=item.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.due(10), [item.pk])
+
+    def test_queue_failure_is_logged(self):
+        '''Сбой при взятии или удалении задачи не выходит из run()'''
+        item = remember.delay(1)
+        locked = OperationalError('database table is locked')
+        with mock.patch.object(tasks, 'claim', side_effect=locked), \
+                self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(tasks.run(item.pk), tasks.ERROR)
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.due(10), [item.pk])
+        with mock.patch('django.db.models.QuerySet.delete',
+                        side_effect=locked), \
+                self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(tasks.run(item.pk), tasks.ERROR)
+        self.assertEqual(calls, ['1'])
+
+    def test_abandoned_last_attempt_is_dead(self):
+        '''Воркер умер на последней попытке: задачу больше не выдают,
+        после аренды она dead'''
+        item = fail.delay()
+        self.assertIsNotNone(tasks.claim(item.pk))
+        Task.objects.filter(pk=item.pk).update(attempts=item.max_attempts)
+        # аренда ещё идёт — задача не тронута
+        self.assertEqual(tasks.expire(), 0)
+        Task.objects.filter(pk=item.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.due(10), [])
+        self.assertIsNone(tasks.claim(item.pk))
+        with self.assertLogs('core.tasks', 'ERROR'):
+            self.assertEqual(tasks.expire(), 1)
+        item.refresh_from_db()
+        self.assertEqual(item.state, Task.DEAD)
+        self.assertEqual(item.attempts, item.max_attempts)
+        self.assertIn('Аренда истекла', item.last_error)
+
+    def test_abandoned_attempt_with_attempts_left_is_retried(self):
+        item = fail.delay()
+        tasks.claim(item.pk)
+        Task.objects.filter(pk=item.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(tasks.expire(), 0)
+        self.assertEqual(tasks.due(10), [item.pk])
+
+    def test_only_marked_functions_run(self):
+        with self.assertRaises(ImportError):
+            tasks.resolve('core.tests.test_tasks.plain')
+
+
+class WorkerTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_run_worker_drains_queue(self):
+        for value in range(5):
+            remember.delay(value)
+        fail.delay()
+        output = StringIO()
+        # общая БД в памяти блокирует таблицы целиком: с одним потоком
+        # задачи не соперничают за неё и тест не зависит от случая
+        call_command('run_worker', '--once', '--threads', '1',
+                     stdout=output)
+        self.assertEqual(sorted(calls), ['0', '1', '2', '3', '4'])
+        self.assertIn('выполнено: 5, отложено: 1', output.getvalue())
+        self.assertEqual(Task.objects.get().name,
+                         'core.tests.test_tasks.fail')
+
+    def test_worker_survives_queue_failure(self):
+        '''Сбой очереди на одной задаче не останавливает воркер'''
+        for value in range(3):
+            remember.delay(value)
+        claim = tasks.claim
+        failures = iter([OperationalError('database table is locked')])
+
+        def flaky_claim(task_id):
+            error = next(failures, None)
+            if error is not None:
+                raise error
+            return claim(task_id)
+
+        output = StringIO()
+        with mock.patch.object(tasks, 'claim', side_effect=flaky_claim), \
+                self.assertLogs('core.tasks', 'ERROR'):
+            call_command('run_worker', '--once', '--threads', '1',
+                         stdout=output)
+        self.assertEqual(sorted(calls), ['0', '1', '2'])
+        self.assertIn('сбоев очереди: 1', output.getvalue())
+
+    def test_worker_buries_abandoned_task(self):
+        '''Задача, убившая прежний воркер на последней попытке, не
+        выполняется снова'''
+        item = remember.delay('снова')
+        Task.objects.filter(pk=item.pk).update(
+            attempts=item.max_attempts,
+            locked_until=timezone.now() - timedelta(seconds=1))
+        output = StringIO()
+        with self.assertLogs('core.tasks', 'ERROR'):
+            call_command('run_worker', '--once', '--threads', '1',
+                         stdout=output)
+        self.assertEqual(calls, [])
+        self.assertEqual(Task.objects.get().state, Task.DEAD)
+        self.assertIn('не выполнено: 1', output.getvalue())
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_after_commit(self):
+        with transaction.atomic():
+            remember.delay('сразу')
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, ['сразу'])
@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 
+from . import search
 from .models import Post
 from .models import Group
 
@@ -10,7 +12,8 @@ class PostAdmin(admin.ModelAdmin):
     # Это позволит изменять поле group в любом посте
     # без лишних движений мышкой, прямо из списка постов
     list_editable = ('group',)
-    # Добавляем интерфейс для поиска по тексту постов
+    # Добавляем интерфейс для поиска по тексту постов;
+    # ищем по индексу FTS5, а не icontains по всей таблице
     search_fields = ('text',)
     # Добавляем возможность фильтрации по дате
     list_filter = ('pub_date',)
@@ -18,6 +21,12 @@ class PostAdmin(admin.ModelAdmin):
     # где пусто — там будет эта строка
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        matching = search.matching_ids(search_term)
+        if matching is None:
+            return queryset, False
+        return queryset.filter(pk__in=RawSQL(*matching)), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('title', 'slug', 'description')
@@ -0,0 +1,85 @@
+"""Денормализованные счётчики постов, комментариев и подписок."""
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import Comment, Follow, Post, UserStats
+
+USER_FIELDS = ('posts_count', 'followers_count', 'following_count')
+
+
+def _bump(queryset, field, delta):
+    # счётчик не уходит в минус, даже если успел разойтись с данными
+    value = F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+    return queryset.update(**{field: value})
+
+
+def bump_user(user_id, field, delta):
+    """Сдвигает счётчик пользователя на delta одним UPDATE."""
+    with transaction.atomic():
+        updated = _bump(UserStats.objects.filter(user_id=user_id),
+                        field, delta)
+        if not updated and delta > 0:
+            # строки ещё нет — считаем её целиком
+            recount_users([user_id])
+
+
+def bump_post(post_id, delta):
+    """Сдвигает счётчик комментариев поста на delta."""
+    if post_id is not None:
+        _bump(Post.objects.filter(pk=post_id), 'comments_count', delta)
+
+
+def _grouped(queryset, key, ids):
+    # order_by() убирает Meta.ordering из GROUP BY
+    return dict(queryset.filter(**{f'{key}__in': ids}).order_by()
+                .values(key).annotate(total=Count('pk'))
+                .values_list(key, 'total'))
+
+
+def recount_users(user_ids):
+    """Пересчитывает счётчики пользователей, возвращает число исправленных."""
+    user_ids = list(user_ids)
+    posts = _grouped(Post.objects, 'author_id', user_ids)
+    followers = _grouped(Follow.objects, 'author_id', user_ids)
+    following = _grouped(Follow.objects, 'user_id', user_ids)
+    current = {stats.user_id: stats for stats in
+               UserStats.objects.filter(user_id__in=user_ids)}
+    changed, missing = [], []
+    for user_id in user_ids:
+        values = (posts.get(user_id, 0), followers.get(user_id, 0),
+                  following.get(user_id, 0))
+        stats = current.get(user_id)
+        if stats is None:
+            missing.append(UserStats(user_id=user_id,
+                                     **dict(zip(USER_FIELDS, values))))
+        elif tuple(getattr(stats, f) for f in USER_FIELDS) != values:
+            for field, value in zip(USER_FIELDS, values):
+                setattr(stats, field, value)
+            changed.append(stats)
+    UserStats.objects.bulk_update(changed, USER_FIELDS)
+    UserStats.objects.bulk_create(missing, ignore_conflicts=True)
+    return len(changed) + len(missing)
+
+
+def recount_posts(post_ids):
+    """Пересчитывает счётчики комментариев, возвращает число исправленных."""
+    post_ids = list(post_ids)
+    comments = _grouped(Comment.objects, 'post_id', post_ids)
+    changed = []
+    for post in Post.objects.filter(pk__in=post_ids).only('comments_count'):
+        total = comments.get(post.pk, 0)
+        if post.comments_count != total:
+            post.comments_count = total
+            changed.append(post)
+    Post.objects.bulk_update(changed, ['comments_count'])
+    return len(changed)
+
+
+def stats_for(user):
+    """Счётчики пользователя; недостающая строка создаётся пересчётом."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        recount_users([user.pk])
+        return UserStats.objects.get(pk=user.pk)
@@ -0,0 +1,95 @@
+"""Лента подписок, материализованная при записи (fan-out on write)."""
+from django.conf import settings
+from django.db import connection
+
+from .models import FeedItem, Follow, Post
+from .utils import count_key, invalidate_counts
+
+
+def _items(user_ids, posts):
+    return [FeedItem(user_id=user_id, post_id=post.pk,
+                     pub_date=post.pub_date)
+            for user_id in user_ids for post in posts]
+
+
+def _deliver(user_ids, posts):
+    FeedItem.objects.bulk_create(_items(user_ids, posts),
+                                 batch_size=settings.FEED_BATCH_SIZE,
+                                 ignore_conflicts=True)
+    invalidate_counts(*(count_key('feed', user_id) for user_id in user_ids))
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам всех подписчиков автора."""
+    followers = (Follow.objects.filter(author_id=post.author_id)
+                 .values_list('user_id', flat=True).iterator())
+    batch = []
+    for user_id in followers:
+        batch.append(user_id)
+        if len(batch) >= settings.FEED_BATCH_SIZE:
+            _deliver(batch, [post])
+            batch = []
+    if batch:
+        _deliver(batch, [post])
+
+
+def forget_post(post):
+    """Сбрасывает число записей лент, из которых ушёл удалённый пост.
+
+    Сами записи FeedItem удаляются каскадом вместе с постом.
+    """
+    followers = (Follow.objects.filter(author_id=post.author_id)
+                 .values_list('user_id', flat=True).iterator())
+    batch = []
+    for user_id in followers:
+        batch.append(count_key('feed', user_id))
+        if len(batch) >= settings.FEED_BATCH_SIZE:
+            invalidate_counts(*batch)
+            batch = []
+    if batch:
+        invalidate_counts(*batch)
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя последние посты автора."""
+    posts = (Post.objects.filter(author_id=author_id)
+             .order_by('-pub_date', '-id')
+             .only('id', 'pub_date')[:settings.FEED_BACKFILL_SIZE])
+    _deliver([user_id], posts)
+
+
+def purge(user_id, author_id):
+    """Убирает из ленты читателя все посты автора."""
+    FeedItem.objects.filter(user_id=user_id,
+                            post__author_id=author_id).delete()
+    invalidate_counts(count_key('feed', user_id))
+
+
+def rebuild():
+    """Пересобирает ленты всех читателей с нуля.
+
+    Одним INSERT ... SELECT: в ленту попадают последние
+    FEED_BACKFILL_SIZE постов каждого автора, как при backfill,
+    но без запроса на каждую подписку.
+    """
+    FeedItem.objects.all().delete()
+    sql = (f'INSERT INTO {FeedItem._meta.db_table} (user_id, post_id, '
+           f'pub_date) SELECT user_id, post_id, pub_date FROM ('
+           f'SELECT follow.user_id, post.id AS post_id, post.pub_date, '
+           f'ROW_NUMBER() OVER (PARTITION BY follow.user_id, '
+           f'follow.author_id ORDER BY post.pub_date DESC, post.id DESC) '
+           f'AS position FROM {Follow._meta.db_table} follow '
+           f'JOIN {Post._meta.db_table} post '
+           f'ON post.author_id = follow.author_id) '
+           f'WHERE position <= %s')
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [settings.FEED_BACKFILL_SIZE])
+    readers = Follow.objects.values_list('user_id', flat=True).distinct()
+    invalidate_counts(*(count_key('feed', user_id)
+                        for user_id in readers.iterator()))
+
+
+def feed_for(user):
+    """Записи ленты читателя вместе с постами, для paginate()."""
+    return FeedItem.objects.filter(user=user).select_related(
+        'post__author', 'post__group')
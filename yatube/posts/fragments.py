@@ -0,0 +1,103 @@
+"""Кэш HTML карточек постов в списках (posts/includes/post_list.html).
+
+Ключ карточки — id поста и хеш всего, что она показывает: текста,
+даты, числа комментариев, картинки и файлов её копий, имени автора и
+группы. Изменился пост, копии картинки пересоздали, автор
+переименовался или пост перенесли в другую группу — у карточки новый
+ключ, а старая запись просто истечёт; сбрасывать ничего не нужно.
+Страница берёт карточки всех постов одним cache.get_many
+(FragmentBatch) и рендерит только промахи, а их сохраняет одним
+set_many.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .templatetags.post_images import post_picture
+
+# увеличить при изменении шаблона карточки
+VERSION = 1
+
+
+def fragment_key(post, picture=None):
+    """Ключ карточки; picture — готовые копии картинки (post_picture)."""
+    author = post.author
+    parts = (VERSION, post.text, post.pub_date.isoformat(),
+             post.comments_count, post.image.name or '',
+             picture.files if picture is not None else (), post.group_id,
+             author.username, author.first_name, author.last_name)
+    digest = hashlib.md5(repr(parts).encode()).hexdigest()
+    return f'posts:fragment:{post.pk}:{digest}'
+
+
+class FragmentBatch:
+    """Карточки всех постов страницы: один get_many и один set_many.
+
+    Как ThumbnailBatch, читает кэш при первом обращении. Новые
+    карточки копятся и сохраняются, когда страница запросила
+    карточку последнего поста. Копии картинок для ключей берутся
+    из thumbnails (ThumbnailBatch той же страницы).
+    """
+
+    def __init__(self, posts, thumbnails):
+        self.posts = posts
+        self.thumbnails = thumbnails
+        self._keys = None
+        self._cached = None
+        self._missed = {}
+        self._served = 0
+
+    def _load(self):
+        self._keys = {post.pk: fragment_key(post, self.thumbnails.get(post))
+                      for post in self.posts}
+        self._cached = cache.get_many(list(self._keys.values()))
+
+    def _key(self, post):
+        return (self._keys.get(post.pk)
+                or fragment_key(post, self.thumbnails.get(post)))
+
+    def get(self, post):
+        """HTML карточки или None, если её нужно отрендерить."""
+        if self._keys is None:
+            self._load()
+        self._served += 1
+        key = self._key(post)
+        html = self._cached.get(key)
+        if html is not None:
+            # промах последней карточки сохранит store()
+            self._flush_if_done()
+        return html
+
+    def store(self, post, html):
+        self._missed[self._key(post)] = html
+        self._flush_if_done()
+
+    def _flush_if_done(self):
+        if self._missed and self._served >= len(self._keys):
+            cache.set_many(self._missed, settings.POST_FRAGMENT_TIMEOUT)
+            self._missed = {}
+
+
+def cached_card(context, post, render):
+    """HTML карточки из кэша или render(), сохранённый в кэш.
+
+    Общая часть тега postfragment для шаблонов Django и Jinja2.
+    Пока копии картинки создаются, карточка временная и не кэшируется.
+    """
+    batch = context.get('fragment_batch')
+    if batch is not None:
+        html = batch.get(post)
+    else:
+        key = fragment_key(post, post_picture(context, post))
+        html = cache.get(key)
+    if html is not None:
+        return html
+    html = render()
+    if post.image and post_picture(context, post) is None:
+        return html
+    if batch is not None:
+        batch.store(post, html)
+    else:
+        cache.set(key, html, settings.POST_FRAGMENT_TIMEOUT)
+    return html
@@ -0,0 +1,295 @@
+"""Нагрузочный прогон: смесь запросов гостей и вошедших пользователей.
+
+Запросы идут либо в WSGI-приложение в этом же процессе, либо по HTTP
+на запущенный сервер. Каждый поток — отдельный посетитель со своими
+cookie. Маршрут выбирается по весам смеси, объект (пост, группа,
+автор) — по закону Ципфа, чтобы популярные страницы запрашивались
+чаще. Итог — задержки p50/p95/p99, RPS и доля ошибок по маршрутам.
+"""
+import http.client
+import math
+import random
+import threading
+import time
+from http.cookies import SimpleCookie
+from io import BytesIO
+from urllib.parse import urlencode, urlsplit
+
+from django.urls import reverse
+
+from .models import Group, Post, User
+from .seed import zipf
+
+# маршрут -> вес по умолчанию; *_create, add_comment, profile_follow —
+# запись, follow_index и запись выполняют вошедшие пользователи
+MIX = {
+    'index': 30, 'group_list': 15, 'profile': 15, 'post_detail': 25,
+    'follow_index': 8, 'post_create': 2, 'add_comment': 4,
+    'profile_follow': 1,
+}
+LOGGED_IN = {'follow_index', 'post_create', 'add_comment', 'profile_follow'}
+SAMPLE = 1000
+# гостевой адрес: вне INTERNAL_IPS, иначе страницы рендерит
+# ещё и debug toolbar
+REMOTE_ADDR = '192.0.2.1'
+
+
+def parse_mix(text):
+    """Смесь из строки вида «index=30,post_detail=25»."""
+    mix = {}
+    for item in filter(None, text.split(',')):
+        name, _, weight = item.partition('=')
+        if name not in MIX:
+            raise ValueError(f'Неизвестный маршрут {name}')
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('В смеси нет ни одного маршрута')
+    return mix
+
+
+def percentile(ordered, fraction):
+    """Перцентиль по ближайшему рангу из отсортированного списка."""
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class WSGITransport:
+    """Вызывает WSGI-приложение в этом же процессе."""
+
+    def __init__(self, application):
+        self.application = application
+
+    def request(self, method, path, body, headers):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path,
+            'QUERY_STRING': query, 'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': REMOTE_ADDR, 'wsgi.url_scheme': 'http',
+            'wsgi.input': BytesIO(body), 'wsgi.errors': BytesIO(),
+            'wsgi.version': (1, 0), 'wsgi.multithread': True,
+            'wsgi.multiprocess': False, 'wsgi.run_once': False,
+            'CONTENT_LENGTH': str(len(body)),
+        }
+        for name, value in headers.items():
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ[key] = value
+            else:
+                environ[f'HTTP_{key}'] = value
+        response = {}
+
+        def start_response(status, response_headers, exc_info=None):
+            response['status'] = int(status.split()[0])
+            response['headers'] = response_headers
+
+        result = self.application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return response['status'], response['headers']
+
+
+class HTTPTransport:
+    """Ходит на запущенный сервер; у каждого потока своё соединение."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.connection_class = (http.client.HTTPSConnection
+                                 if parts.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.local = threading.local()
+
+    def request(self, method, path, body, headers):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.connection_class(self.netloc, timeout=30)
+            self.local.connection = connection
+        try:
+            connection.request(method, self.prefix + path, body, headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self.local.connection = None
+            connection.close()
+            raise
+        return response.status, response.getheaders()
+
+
+class Visitor:
+    """Посетитель с cookie; CSRF-токен берёт из cookie csrftoken."""
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.cookies = {}
+
+    def request(self, method, path, data=None):
+        headers = {}
+        body = b''
+        if self.cookies:
+            headers['Cookie'] = '; '.join(
+                f'{name}={value}' for name, value in self.cookies.items())
+        if method == 'POST':
+            body = urlencode(data or {}).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            headers['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+        status, response_headers = self.transport.request(
+            method, path, body, headers)
+        for name, value in response_headers:
+            if name.lower() == 'set-cookie':
+                for morsel in SimpleCookie(value).values():
+                    self.cookies[morsel.key] = morsel.value
+        return status
+
+    def login(self, username, password):
+        path = reverse('users:login')
+        self.request('GET', path)
+        status = self.request('POST', path, {'username': username,
+                                             'password': password})
+        if status != 302:
+            raise RuntimeError(f'{username} не смог войти: {status}')
+
+
+class Targets:
+    """Образцы постов, групп и авторов, популярные — чаще."""
+
+    def __init__(self, rng):
+        self.random = rng
+        self.posts = self._ranked(
+            Post.objects.order_by('?').values_list('pk', flat=True))
+        self.groups = self._ranked(
+            Group.objects.order_by('?').values_list('slug', flat=True))
+        self.authors = self._ranked(
+            User.objects.order_by('?').values_list('username', flat=True))
+
+    @staticmethod
+    def _ranked(queryset):
+        items = list(queryset[:SAMPLE])
+        return items, zipf(len(items), 1.0)
+
+    def pick(self, kind):
+        items, weights = getattr(self, kind)
+        if not items:
+            return None
+        return self.random.choices(items, cum_weights=weights)[0]
+
+
+def _path_for(route, targets, rng):
+    """Метод, путь и данные запроса маршрута или None, если не к чему."""
+    if route == 'index':
+        return 'GET', reverse('posts:index'), None
+    if route == 'follow_index':
+        return 'GET', reverse('posts:follow_index'), None
+    if route == 'post_create':
+        return 'POST', reverse('posts:post_create'), {
+            'text': f'Нагрузочный пост {rng.random()}'}
+    kind, name, data = {
+        'group_list': ('groups', 'slug', None),
+        'profile': ('authors', 'username', None),
+        'profile_follow': ('authors', 'username', None),
+        'post_detail': ('posts', 'post_id', None),
+        'add_comment': ('posts', 'post_id',
+                        {'text': f'Нагрузочный комментарий {rng.random()}'}),
+    }[route]
+    target = targets.pick(kind)
+    if target is None:
+        return None
+    path = reverse(f'posts:{route}', kwargs={name: target})
+    return ('POST' if data else 'GET'), path, data
+
+
+class LoadTest:
+    """Прогон: workers потоков в течение duration секунд."""
+
+    def __init__(self, transport, mix, workers, duration, accounts=(),
+                 password=None, seed=0):
+        self.transport = transport
+        self.mix = mix
+        self.workers = workers
+        self.duration = duration
+        self.accounts = list(accounts)
+        self.password = password
+        self.seed = seed
+        self.latencies = {route: [] for route in mix}
+        self.errors = dict.fromkeys(mix, 0)
+        self.lock = threading.Lock()
+
+    def run(self):
+        """Выполняет прогон и возвращает отчёт (dict для JSON)."""
+        self.targets = Targets(random.Random(self.seed))
+        visitors = [Visitor(self.transport) for _ in range(self.workers)]
+        if self.accounts:
+            # вход до старта часов: он не входит в замер
+            for number, visitor in enumerate(visitors):
+                visitor.login(self.accounts[number % len(self.accounts)],
+                              self.password)
+        threads = [threading.Thread(target=self.worker,
+                                    args=(number, visitor))
+                   for number, visitor in enumerate(visitors)]
+        started = time.perf_counter()
+        self.deadline = started + self.duration
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.report(time.perf_counter() - started)
+
+    def worker(self, number, visitor):
+        rng = random.Random(self.seed * 1000 + number)
+        routes = list(self.mix)
+        if not self.accounts:
+            # без учётных записей вошедших маршрутов нет
+            routes = [route for route in routes if route not in LOGGED_IN]
+        weights = [self.mix[route] for route in routes]
+        while time.perf_counter() < self.deadline and routes:
+            route, = rng.choices(routes, weights=weights)
+            request = _path_for(route, self.targets, rng)
+            if request is None:
+                continue
+            started = time.perf_counter()
+            try:
+                status = visitor.request(*request)
+                failed = status >= 400
+            except Exception:
+                failed = True
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.latencies[route].append(elapsed)
+                self.errors[route] += failed
+
+    def report(self, elapsed):
+        routes = {}
+        for route, latencies in self.latencies.items():
+            if latencies:
+                routes[route] = self._stats(latencies,
+                                            self.errors[route], elapsed)
+        everything = [value for latencies in self.latencies.values()
+                      for value in latencies]
+        return {
+            'duration': round(elapsed, 3),
+            'workers': self.workers,
+            'mix': self.mix,
+            'total': self._stats(everything, sum(self.errors.values()),
+                                 elapsed),
+            'routes': routes,
+        }
+
+    @staticmethod
+    def _stats(latencies, errors, elapsed):
+        ordered = sorted(latencies)
+        stats = {'requests': len(ordered),
+                 'rps': round(len(ordered) / elapsed, 2),
+                 'error_rate': round(errors / len(ordered), 4)
+                 if ordered else 0.0}
+        for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+            value = percentile(ordered, fraction)
+            stats[f'{name}_ms'] = (None if value is None
+                                   else round(value * 1000, 2))
+        return stats
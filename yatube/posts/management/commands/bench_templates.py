@@ -0,0 +1,90 @@
+import time
+import uuid
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from posts.models import Group, Post, User, UserStats
+
+PAGES = ('posts/index.html', 'posts/group_list.html', 'posts/profile.html',
+         'posts/follow.html')
+
+
+class NoFragments:
+    """fragment_batch без кэша: замеряем только рендеринг."""
+
+    def get(self, post):
+        return None
+
+    def store(self, post, html):
+        pass
+
+
+def make_posts(count):
+    group = Group(pk=1, title='Группа', slug='group',
+                  description='Описание группы')
+    authors = [User(pk=pk, username=f'author{pk}', first_name='Имя',
+                    last_name=f'Фамилия{pk}') for pk in range(1, 11)]
+    now = timezone.now()
+    return group, authors[0], [
+        Post(pk=pk, author=authors[pk % 10],
+             group=group if pk % 3 else None, pub_date=now,
+             comments_count=pk % 7,
+             text=f'Текст поста {pk} ' + 'и ещё немного слов ' * 10)
+        for pk in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время рендеринга страниц лент шаблонами Django '
+            'и Jinja2 при 10, 50 и 100 постах на странице')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--sizes', type=int, nargs='+',
+                            default=[10, 50, 100])
+
+    def handle(self, *args, **options):
+        if 'jinja2' not in engines:
+            raise CommandError('Jinja2 не установлен: pip install Jinja2')
+        iterations = options['iterations']
+        self.stdout.write(f'{"шаблон":<24}{"постов":>7}{"Django, мс":>12}'
+                          f'{"Jinja2, мс":>12}{"ускорение":>11}')
+        for name in PAGES:
+            for size in options['sizes']:
+                timings = [self.measure(name, size, engine, iterations)
+                           for engine in ('django', 'jinja2')]
+                self.stdout.write(
+                    f'{name:<24}{size:>7}{timings[0]:>12.2f}'
+                    f'{timings[1]:>12.2f}{timings[0] / timings[1]:>10.1f}x')
+
+    def measure(self, name, size, engine, iterations):
+        group, author, posts = make_posts(size)
+        context = {
+            'page_obj': Paginator(posts, size).page(1),
+            'group': group,
+            'author': author,
+            'stats': UserStats(user=author, posts_count=size),
+            'post_count': size,
+            'following': False,
+            'fragment_batch': NoFragments(),
+        }
+        factory = RequestFactory()
+        # прогрев: компиляция и загрузка шаблонов
+        self.render(name, context, engine, factory)
+        started = time.perf_counter()
+        for _ in range(iterations):
+            self.render(name, context, engine, factory)
+        return (time.perf_counter() - started) / iterations * 1000
+
+    @staticmethod
+    def render(name, context, engine, factory):
+        # уникальный ?after= — кэш страницы index не срабатывает
+        request = factory.get('/', {'after': uuid.uuid4().hex})
+        request.user = AnonymousUser()
+        return render_to_string(name, context, request=request,
+                                using=engine)
@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии '
+            'и подписки в JSONL, читая базу итератором')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='-',
+                            help='файл; «-» — стандартный вывод')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--progress-every', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        to_stdout = options['output'] == '-'
+        target = (sys.stdout if to_stdout
+                  else open(options['output'], 'w', encoding='utf-8'))
+        # прогресс — в stderr, чтобы не смешать его с выгрузкой
+        log = self.stderr if to_stdout else self.stdout
+        every = options['progress_every']
+        started = time.monotonic()
+        total = 0
+        try:
+            for label, line in transfer.export_lines(options['chunk_size']):
+                target.write(line)
+                total += 1
+                if total % every == 0:
+                    log.write(self.rate(total, started, label))
+        finally:
+            if not to_stdout:
+                target.close()
+        log.write(self.style.SUCCESS(self.rate(total, started, 'готово')))
+
+    @staticmethod
+    def rate(total, started, label):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        return (f'{label}: {total} строк, '
+                f'{total / elapsed:.0f} строк/с')
@@ -0,0 +1,38 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Exists, F, OuterRef
+
+from posts import thumbnails
+from posts.models import ImageVariant, Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт недостающие копии для уже загруженных картинок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=0,
+                            help='процессов; 0 — в текущем процессе')
+        parser.add_argument('--all', action='store_true',
+                            help='пересоздать и уже готовые копии')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            ready = ImageVariant.objects.filter(post=OuterRef('pk'),
+                                                source=F('post__image'))
+            posts = posts.annotate(ready=Exists(ready)).filter(ready=False)
+        ids = list(posts.order_by('pk').values_list('pk', flat=True))
+        workers = options['workers']
+        if workers:
+            # процессы создаются через fork: соединения не должны
+            # достаться им открытыми
+            connections.close_all()
+            with ProcessPoolExecutor(workers) as pool:
+                list(pool.map(thumbnails.generate, ids, chunksize=20))
+        else:
+            for pk in ids:
+                thumbnails.generate(pk)
+        self.stdout.write(self.style.SUCCESS(
+            f'Копии картинок готовы для {len(ids)} постов'))
@@ -0,0 +1,82 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from posts import search, transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает JSONL из export_posts пачками bulk_create; '
+            'ленты, счётчики и поисковый индекс пересобираются один раз '
+            'в конце')
+
+    def add_arguments(self, parser):
+        parser.add_argument('input')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--resume', action='store_true',
+                            help='продолжить с сохранённой позиции')
+
+    def handle(self, *args, **options):
+        path = options['input']
+        self.checkpoint = path + '.checkpoint'
+        offset = self.read_checkpoint() if options['resume'] else 0
+        self.batch_size = options['batch_size']
+        self.started = time.monotonic()
+        self.total = 0
+        # триггеры поиска на время загрузки отключены; search.rebuild
+        # в конце или после сбоя собирает индекс и возвращает их в одной
+        # транзакции. Если процесс убит, их вернёт повторный запуск
+        # (--resume) или manage.py rebuild_search_index
+        search.drop_triggers()
+        try:
+            with open(path, 'rb') as source, transfer.given_dates():
+                source.seek(offset)
+                self.load(source)
+        except BaseException:
+            search.rebuild()
+            raise
+        transfer.rebuild_derived(self.stdout)
+        os.remove(self.checkpoint)
+        self.stdout.write(self.style.SUCCESS(self.rate('готово')))
+
+    def read_checkpoint(self):
+        try:
+            with open(self.checkpoint) as checkpoint:
+                return int(checkpoint.read())
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(f'Повреждена контрольная точка '
+                               f'{self.checkpoint}')
+
+    def load(self, source):
+        model, batch = None, []
+        while True:
+            line = source.readline()
+            if line.strip():
+                row_model, obj = transfer.parse_line(line)
+                if row_model is not model or len(batch) >= self.batch_size:
+                    self.flush(model, batch, source.tell() - len(line))
+                    model, batch = row_model, []
+                batch.append(obj)
+            elif not line:
+                self.flush(model, batch, source.tell())
+                return
+
+    def flush(self, model, batch, offset):
+        """Сохраняет пачку и запоминает позицию файла после неё."""
+        if batch:
+            with transaction.atomic():
+                # повторная загрузка после сбоя не создаёт дублей
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+            self.total += len(batch)
+            self.stdout.write(self.rate(model._meta.label_lower))
+        with open(self.checkpoint, 'w') as checkpoint:
+            checkpoint.write(str(offset))
+
+    def rate(self, label):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        return (f'{label}: {self.total} строк, '
+                f'{self.total / elapsed:.0f} строк/с')
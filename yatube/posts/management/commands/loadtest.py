@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import loadtest, seed
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон смеси запросов в WSGI-приложение этого '
+            'процесса или на сервер по --url; отчёт о задержках '
+            'p50/p95/p99, RPS и ошибках по маршрутам в JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='адрес сервера, например '
+                            'http://127.0.0.1:8000; без него — в процессе')
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--mix', default='',
+                            help='веса маршрутов: index=30,post_detail=25')
+        parser.add_argument('--accounts', type=int, default=None,
+                            help='сколько пользователей войдут '
+                                 '(по умолчанию по одному на поток)')
+        parser.add_argument('--password', default=seed.PASSWORD)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='файл для отчёта')
+
+    def handle(self, *args, **options):
+        try:
+            mix = (loadtest.parse_mix(options['mix']) if options['mix']
+                   else loadtest.MIX)
+        except ValueError as error:
+            raise CommandError(error)
+        if options['url']:
+            transport = loadtest.HTTPTransport(options['url'])
+        else:
+            from yatube.wsgi import application
+            transport = loadtest.WSGITransport(application)
+        wanted = options['accounts']
+        if wanted is None:
+            wanted = options['workers']
+        accounts = (User.objects.filter(is_staff=False, is_active=True)
+                    .order_by('pk').values_list('username', flat=True)
+                    [:wanted])
+        test = loadtest.LoadTest(
+            transport, mix, options['workers'], options['duration'],
+            accounts=accounts, password=options['password'],
+            seed=options['seed'])
+        try:
+            report = test.run()
+        except RuntimeError as error:
+            raise CommandError(error)
+        report['target'] = options['url'] or 'wsgi'
+        text = json.dumps(report, indent=2, sort_keys=True,
+                          ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(text + '\n')
+        else:
+            self.stdout.write(text)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import feed
+from posts.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает ленты подписок (таблицу FeedItem) с нуля'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Лента пересобрана: {FeedItem.objects.count()} записей'))
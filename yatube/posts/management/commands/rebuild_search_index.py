@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = ('Заново заполняет полнотекстовый индекс постов и комментариев, '
+            'читая строки пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = search.rebuild(options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'В поисковом индексе {total} постов'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+from posts.models import Post, User
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики постов, комментариев и подписок '
+            'пакетами и исправляет расхождения')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def batches(self, queryset, size):
+        batch = []
+        for pk in queryset.order_by('pk').values_list('pk', flat=True)\
+                .iterator(chunk_size=size):
+            batch.append(pk)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def handle(self, *args, **options):
+        size = options['batch_size']
+        fixed_users = sum(counters.recount_users(batch)
+                          for batch in self.batches(User.objects, size))
+        fixed_posts = sum(counters.recount_posts(batch)
+                          for batch in self.batches(Post.objects, size))
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: пользователей {fixed_users}, '
+            f'постов {fixed_posts}'))
@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    # начальные значения счётчиков для уже существующих данных
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    UserStats = apps.get_model('posts', 'UserStats')
+    users = User.objects.annotate(
+        n_posts=Count('posts', distinct=True),
+        n_followers=Count('following', distinct=True),
+        n_following=Count('follower', distinct=True))
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user.pk, posts_count=user.n_posts,
+                   followers_count=user.n_followers,
+                   following_count=user.n_following) for user in users],
+        batch_size=500)
+    posts = Post.objects.annotate(n_comments=Count('comments')).order_by()
+    for post in posts.filter(n_comments__gt=0):
+        Post.objects.filter(pk=post.pk).update(comments_count=post.n_comments)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0010_auto_20261018_1940'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+            ],
+            options={
+                'verbose_name': 'Счётчики пользователя',
+                'verbose_name_plural': 'Счётчики пользователей',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# SQL записан как есть, а не взят из posts.search: правки модуля
+# не должны менять уже применённую миграцию
+
+FOLD_COMMENTS = ("(SELECT coalesce(group_concat(replace(replace(text, "
+                 "'ё', 'е'), 'Ё', 'Е'), ' '), '') FROM posts_comment "
+                 "WHERE post_id = {ref}.post_id)")
+
+
+def refresh_comments(ref):
+    return (f"UPDATE posts_search SET comments = "
+            f"{FOLD_COMMENTS.format(ref=ref)} WHERE rowid = {ref}.post_id;")
+
+
+SCHEMA = (
+    "CREATE VIRTUAL TABLE posts_search USING fts5(text, comments, "
+    "tokenize = 'unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER posts_search_post_insert AFTER INSERT ON posts_post "
+    "BEGIN INSERT INTO posts_search (rowid, text, comments) VALUES "
+    "(new.id, replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е'), ''); END",
+    "CREATE TRIGGER posts_search_post_update AFTER UPDATE OF text "
+    "ON posts_post BEGIN UPDATE posts_search SET text = "
+    "replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е') "
+    "WHERE rowid = new.id; END",
+    "CREATE TRIGGER posts_search_post_delete AFTER DELETE ON posts_post "
+    "BEGIN DELETE FROM posts_search WHERE rowid = old.id; END",
+    f"CREATE TRIGGER posts_search_comment_insert AFTER INSERT "
+    f"ON posts_comment BEGIN {refresh_comments('new')} END",
+    f"CREATE TRIGGER posts_search_comment_update AFTER UPDATE OF text, "
+    f"post_id ON posts_comment BEGIN {refresh_comments('old')} "
+    f"{refresh_comments('new')} END",
+    f"CREATE TRIGGER posts_search_comment_delete AFTER DELETE "
+    f"ON posts_comment BEGIN {refresh_comments('old')} END",
+)
+DROP = (
+    *(f'DROP TRIGGER IF EXISTS posts_search_{name}'
+      for name in ('post_insert', 'post_update', 'post_delete',
+                   'comment_insert', 'comment_update', 'comment_delete')),
+    'DROP TABLE IF EXISTS posts_search',
+)
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SCHEMA:
+        schema_editor.execute(statement)
+    # посты и комментарии, созданные до индекса
+    schema_editor.execute(
+        "INSERT INTO posts_search (rowid, text, comments) "
+        "SELECT p.id, replace(replace(p.text, 'ё', 'е'), 'Ё', 'Е'), "
+        "coalesce((SELECT group_concat(replace(replace(c.text, 'ё', 'е'), "
+        "'Ё', 'Е'), ' ') FROM posts_comment c WHERE c.post_id = p.id), '') "
+        "FROM posts_post p")
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_auto_20261018_1955'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
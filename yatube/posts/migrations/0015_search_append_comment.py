@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# SQL записан как есть, а не взят из posts.search (см. 0014)
+
+DROP = 'DROP TRIGGER IF EXISTS posts_search_comment_insert'
+APPEND = (
+    "CREATE TRIGGER posts_search_comment_insert AFTER INSERT "
+    "ON posts_comment BEGIN UPDATE posts_search SET comments = "
+    "CASE WHEN comments = '' "
+    "THEN replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е') "
+    "ELSE comments || ' ' || replace(replace(new.text, 'ё', 'е'), 'Ё', 'Е') "
+    "END WHERE rowid = new.post_id; END")
+REFRESH = (
+    "CREATE TRIGGER posts_search_comment_insert AFTER INSERT "
+    "ON posts_comment BEGIN UPDATE posts_search SET comments = "
+    "(SELECT coalesce(group_concat(replace(replace(text, 'ё', 'е'), "
+    "'Ё', 'Е'), ' '), '') FROM posts_comment "
+    "WHERE post_id = new.post_id) WHERE rowid = new.post_id; END")
+
+
+def replace_trigger(statement):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        schema_editor.execute(DROP)
+        schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_auto_20261018_2010'),
+    ]
+
+    operations = [
+        migrations.RunPython(replace_trigger(APPEND),
+                             replace_trigger(REFRESH)),
+    ]
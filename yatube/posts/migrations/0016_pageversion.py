@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_search_append_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageVersion',
+            fields=[
+                ('key', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Ключ')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+                ('changed', models.DateTimeField(verbose_name='Изменена')),
+            ],
+            options={
+                'verbose_name': 'Версия страниц',
+                'verbose_name_plural': 'Версии страниц',
+            },
+        ),
+    ]
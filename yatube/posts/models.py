@@ -74,6 +74,13 @@ class Post(CreatedModel):
     # Аргумент upload_to указывает директорию,
     # в которую будут загружаться пользовательские файлы.
 
+    # Счётчик комментариев, ведётся в posts.counters
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+
     def __str__(self) -> str:
         # выводим текст поста
         return self.text[:settings.LEN_OF_POSTS]
@@ -83,6 +90,16 @@ class Post(CreatedModel):
         verbose_name = 'Пост'
         # Многословное имя во множественном числе
         verbose_name_plural = 'Посты'
+        # Индексы под курсорную пагинацию лент по ключу (pub_date, id):
+        # общая лента, посты автора и посты группы
+        indexes = [
+            models.Index(fields=('pub_date', 'id'),
+                         name='post_pub_date_id_idx'),
+            models.Index(fields=('author', '-pub_date', '-id'),
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=('group', '-pub_date', '-id'),
+                         name='post_group_pub_date_idx'),
+        ]
 
 
 class Comment(CreatedModel):
@@ -103,6 +120,9 @@ class Comment(CreatedModel):
         ordering = ('-pub_date',)
         # Многословное имя во множественном числе
         verbose_name_plural = 'Комментарии'
+        # комментарии поста, от новых к старым
+        indexes = [models.Index(fields=('post', '-pub_date', '-id'),
+                                name='comment_post_pub_date_idx')]
 
 
 class Follow(models.Model):
@@ -119,3 +139,86 @@ class Follow(models.Model):
         # Ограничения
         constraints = [models.UniqueConstraint(
             fields=['user', 'author'], name='unique_members')]
+        # подписчики автора (рассылка постов по лентам)
+        indexes = [models.Index(fields=('author', 'user'),
+                                name='follow_author_user_idx')]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, которые иначе считались бы через COUNT(*).
+
+    Ведутся в posts.counters при записи постов и подписок,
+    расхождения исправляет команда recount.
+    """
+    user = models.OneToOneField(User, primary_key=True,
+                                related_name='stats',
+                                on_delete=models.CASCADE)
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+
+class FeedItem(models.Model):
+    """Запись ленты подписок: пост автора в «почтовом ящике» читателя.
+
+    Заполняется при публикации поста и при подписке, поэтому
+    лента читается одним проходом по индексу (user, pub_date, post).
+    """
+    user = models.ForeignKey(User, related_name='feed_items',
+                             on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='feed_items',
+                             on_delete=models.CASCADE)
+    # копия post.pub_date: сортируем ленту без обращения к постам
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'], name='unique_feed_item')]
+        indexes = [models.Index(fields=('user', 'pub_date', 'post'),
+                                name='feed_user_pub_date_idx')]
+
+
+class ImageVariant(models.Model):
+    """Копия картинки поста одной ширины в одном формате.
+
+    Создаётся в posts.thumbnails из post.image; source хранит имя
+    исходного файла, так что после замены картинки старые копии
+    не показываются.
+    """
+    post = models.ForeignKey(Post, related_name='image_variants',
+                             on_delete=models.CASCADE)
+    source = models.CharField('Исходный файл', max_length=100)
+    format = models.CharField('Формат', max_length=4)
+    width = models.PositiveIntegerField('Ширина')
+    height = models.PositiveIntegerField('Высота')
+    file = models.FileField('Файл', max_length=255)
+
+    class Meta:
+        ordering = ('width',)
+        verbose_name = 'Вариант картинки'
+        verbose_name_plural = 'Варианты картинок'
+        constraints = [models.UniqueConstraint(
+            fields=['post', 'source', 'format', 'width'],
+            name='unique_image_variant')]
+
+
+class PageVersion(models.Model):
+    """Версия содержимого страниц области (posts.versions).
+
+    Хранится в БД, а не в кэше: её видят все процессы, а на реплике
+    она меняется вместе с данными, из которых собрана страница.
+    """
+    key = models.CharField('Ключ', max_length=200, primary_key=True)
+    version = models.PositiveIntegerField('Версия', default=0)
+    changed = models.DateTimeField('Изменена')
+
+    class Meta:
+        verbose_name = 'Версия страниц'
+        verbose_name_plural = 'Версии страниц'
@@ -0,0 +1,241 @@
+"""Полнотекстовый поиск по постам и комментариям (SQLite FTS5).
+
+Одна строка таблицы posts_search на пост (rowid = id поста): текст
+поста и склеенные комментарии к нему. Таблицу синхронно ведут
+триггеры на posts_post и posts_comment, так что её обновляют и
+bulk_create, и QuerySet.update. Токенизатор unicode61 приводит
+кириллицу к нижнему регистру; «ё» заменяется на «е» при записи,
+а окончания слов запроса отбрасываются (light_stem), и слово ищется
+по префиксу: «котиков» находит «котик» и «котики».
+"""
+import re
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection, models, transaction
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Comment, Post
+from .utils import CursorPaginator, encode_cursor
+
+TABLE = 'posts_search'
+# вес совпадения в тексте поста и в комментариях для bm25
+WEIGHTS = (10.0, 1.0)
+MAX_TERMS = 8
+# метки совпадений в snippet(): текст экранируется уже после них
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def _fold(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _append_comment(ref):
+    # новый комментарий дописывается в конец, а не склеивается заново
+    # из всех комментариев поста
+    return (f"UPDATE {TABLE} SET comments = CASE WHEN comments = '' "
+            f"THEN {_fold(ref + '.text')} ELSE comments || ' ' || "
+            f"{_fold(ref + '.text')} END WHERE rowid = {ref}.post_id;")
+
+
+def _refresh_comments(ref):
+    return (f"UPDATE {TABLE} SET comments = (SELECT "
+            f"coalesce(group_concat({_fold('text')}, ' '), '') "
+            f"FROM posts_comment WHERE post_id = {ref}.post_id) "
+            f"WHERE rowid = {ref}.post_id;")
+
+
+SCHEMA = (
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5(text, comments, "
+    f"tokenize = 'unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER {TABLE}_post_insert AFTER INSERT ON posts_post BEGIN "
+    f"INSERT INTO {TABLE} (rowid, text, comments) "
+    f"VALUES (new.id, {_fold('new.text')}, ''); END",
+    f"CREATE TRIGGER {TABLE}_post_update AFTER UPDATE OF text "
+    f"ON posts_post BEGIN UPDATE {TABLE} SET text = {_fold('new.text')} "
+    f"WHERE rowid = new.id; END",
+    f"CREATE TRIGGER {TABLE}_post_delete AFTER DELETE ON posts_post BEGIN "
+    f"DELETE FROM {TABLE} WHERE rowid = old.id; END",
+    f"CREATE TRIGGER {TABLE}_comment_insert AFTER INSERT ON posts_comment "
+    f"BEGIN {_append_comment('new')} END",
+    f"CREATE TRIGGER {TABLE}_comment_update AFTER UPDATE OF text, post_id "
+    f"ON posts_comment BEGIN {_refresh_comments('old')} "
+    f"{_refresh_comments('new')} END",
+    f"CREATE TRIGGER {TABLE}_comment_delete AFTER DELETE ON posts_comment "
+    f"BEGIN {_refresh_comments('old')} END",
+)
+DROP = (
+    *(f'DROP TRIGGER IF EXISTS {TABLE}_{name}'
+      for name in ('post_insert', 'post_update', 'post_delete',
+                   'comment_insert', 'comment_update', 'comment_delete')),
+    f'DROP TABLE IF EXISTS {TABLE}',
+)
+
+
+def drop_triggers():
+    """Отключает обновление индекса, например на время импорта."""
+    with connection.cursor() as cursor:
+        for statement in DROP[:-1]:
+            cursor.execute(statement)
+
+
+def create_triggers():
+    drop_triggers()
+    with connection.cursor() as cursor:
+        for statement in SCHEMA[1:]:
+            cursor.execute(statement)
+
+
+# окончания русских слов, от длинных к коротким
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'иях', 'ией', 'ием', 'иям', 'ого', 'его',
+    'ому', 'ему', 'ыми', 'ими', 'ать', 'ять', 'ить', 'еть', 'ешь',
+    'ишь', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое', 'ее', 'ые', 'ие',
+    'ов', 'ев', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем', 'ую', 'юю', 'ью',
+    'ия', 'ья', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят', 'им', 'ла', 'ли',
+    'ло', 'ть', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM = 3
+WORD = re.compile(r'\w+')
+# ключ курсора выдачи: оценка bm25 и id поста
+RANK_FIELDS = (models.FloatField(), models.IntegerField())
+
+
+def light_stem(word):
+    """Слово без окончания, но не короче MIN_STEM букв."""
+    word = word.lower().replace('ё', 'е')
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def match_query(text):
+    """Запрос FTS5 из строки поиска или None, если искать нечего.
+
+    Каждое слово — префикс в кавычках, так что синтаксис FTS5 из
+    пользовательского ввода не выполняется; слова соединяются по И.
+    """
+    terms = [light_stem(word) for word in WORD.findall(text)]
+    return ' '.join(f'"{term}"*' for term in terms[:MAX_TERMS]) or None
+
+
+def highlight(snippet):
+    """Экранированный фрагмент с совпадениями в <mark>."""
+    return mark_safe(escape(snippet).replace(MARK_START, '<mark>')
+                     .replace(MARK_END, '</mark>'))
+
+
+class SearchPaginator(CursorPaginator):
+    """Выдача поиска по ключу (bm25, rowid) курсором.
+
+    Сначала одним запросом выбирается страница id, затем фрагменты
+    только для неё и сами посты с авторами и группами.
+    """
+
+    def __init__(self, query, per_page):
+        Paginator.__init__(self, [], per_page)
+        self.query = query
+        self.key_fields = RANK_FIELDS
+        self.number = 1
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def cursor_for(self, row):
+        return encode_cursor(row)
+
+    def _fetch(self, values, forward):
+        sign, order = ('>', '') if forward else ('<', ' DESC')
+        sql = (f'SELECT score, rowid FROM (SELECT rowid, '
+               f'bm25({TABLE}, %s, %s) AS score FROM {TABLE} '
+               f'WHERE {TABLE} MATCH %s)')
+        params = [*WEIGHTS, self.query]
+        if values is not None:
+            sql += (f' WHERE score {sign} %s '
+                    f'OR (score = %s AND rowid {sign} %s)')
+            params += [values[0], values[0], values[1]]
+        sql += f' ORDER BY score{order}, rowid{order} LIMIT %s'
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params + [self.per_page + 1])
+            return cursor.fetchall()
+
+    def _objects(self, rows):
+        if not rows:
+            return []
+        ids = [rowid for _, rowid in rows]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({TABLE}, -1, %s, %s, '…', 24) "
+                f"FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid IN "
+                f"({', '.join(['%s'] * len(ids))})",
+                [MARK_START, MARK_END, self.query, *ids])
+            snippets = dict(cursor.fetchall())
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        result = []
+        for score, rowid in rows:
+            post = posts.get(rowid)
+            if post is not None:
+                post.rank = score
+                post.snippet = highlight(snippets.get(rowid, ''))
+                result.append(post)
+        return result
+
+
+def search_page(request):
+    """Страница выдачи по ?q= с курсором ?after=/?before= или None."""
+    query = match_query(request.GET.get('q', ''))
+    if query is None:
+        return None
+    paginator = SearchPaginator(query, settings.POSTS_PER_PAGE)
+    return paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
+
+
+def matching_ids(text):
+    """SQL с id постов, подходящих под строку поиска, для pk__in."""
+    query = match_query(text)
+    if query is None:
+        return None
+    return (f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [query])
+
+
+def rebuild(chunk_size=1000):
+    """Заново заполняет индекс, читая посты и комментарии пачками.
+
+    Триггеры создаются заново в той же транзакции: индекс, собранный
+    после импорта или сбоя с отключёнными триггерами, сразу начинает
+    следить за записью, и изменения между ними не теряются.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        create_triggers()
+        cursor.execute(f'DELETE FROM {TABLE}')
+        total = 0
+        posts = Post.objects.order_by('pk').values_list('pk', 'text')
+        chunk = []
+        for row in posts.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                total += _index(cursor, chunk)
+                chunk = []
+        if chunk:
+            total += _index(cursor, chunk)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _index(cursor, chunk):
+    comments = {}
+    for post_id, text in (Comment.objects
+                          .filter(post_id__in=[pk for pk, _ in chunk])
+                          .order_by('pk').values_list('post_id', 'text')):
+        comments.setdefault(post_id, []).append(text)
+    cursor.executemany(
+        f'INSERT INTO {TABLE} (rowid, text, comments) VALUES (%s, %s, %s)',
+        [(pk, _fold_text(text), _fold_text(' '.join(comments.get(pk, []))))
+         for pk, text in chunk])
+    return len(chunk)
+
+
+def _fold_text(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
@@ -0,0 +1,157 @@
+"""Синтетические данные в масштабе: пользователи, группы, посты,
+комментарии и подписки для замеров производительности.
+
+Масштаб 1 — тысяча пользователей и десятки тысяч строк, масштаб 100 —
+миллионы. Распределения неравномерные, как в жизни: число постов
+автора, подписчиков и комментариев к посту подчиняется закону Ципфа
+(немногие авторы пишут и собирают подписчиков больше всех остальных).
+Всё выводится из одного зерна, так что прогоны с одинаковыми
+параметрами дают одинаковые данные.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from faker import Faker
+
+from .models import Comment, Follow, Group, Post, User
+
+# строк каждой модели на единицу масштаба
+SCALE = {'users': 1000, 'groups': 20, 'posts': 10000, 'comments': 30000,
+         'follows': 20000}
+# показатели степени Ципфа: чем больше, тем сильнее перекос
+AUTHOR_SKEW = 1.1
+FOLLOW_SKEW = 1.0
+COMMENT_SKEW = 0.8
+GROUP_SKEW = 1.0
+# доля постов без группы
+NO_GROUP = 0.3
+# данные охватывают год до фиксированной даты: от неё не зависит
+# воспроизводимость
+END = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DAYS = 365
+# пароль всех созданных пользователей — для нагрузочных тестов
+PASSWORD = 'seed-password'
+SENTENCES = 2000
+
+
+def zipf(count, skew):
+    """Накопленные веса рангов 1..count для random.choices."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def _max_pk(model):
+    return (model.objects.order_by('-pk')
+            .values_list('pk', flat=True).first() or 0)
+
+
+class Seeder:
+    """Генераторы объектов всех моделей; pk задаются заранее.
+
+    pk нужны сразу: bulk_create на SQLite их не возвращает, а посты
+    ссылаются на авторов, комментарии — на посты.
+    """
+
+    def __init__(self, scale, seed=0):
+        self.counts = {name: max(1, round(per_unit * scale))
+                       for name, per_unit in SCALE.items()}
+        self.random = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.sentences = [self.faker.sentence(nb_words=12)
+                          for _ in range(SENTENCES)]
+        self.start = END - timedelta(days=DAYS)
+        self.user_ids = []
+        self.group_ids = []
+        self.post_ids = []
+        self.post_dates = []
+
+    def text(self, sentences):
+        return ' '.join(self.random.choices(self.sentences, k=sentences))
+
+    def date_after(self, moment):
+        span = (END - moment).total_seconds()
+        return moment + timedelta(seconds=self.random.random() * span)
+
+    def ranked(self, ids):
+        """Ид в случайном порядке рангов: первый получит больше всех."""
+        ids = list(ids)
+        self.random.shuffle(ids)
+        return ids
+
+    def users(self):
+        password = make_password(PASSWORD)
+        first = _max_pk(User) + 1
+        for pk in range(first, first + self.counts['users']):
+            self.user_ids.append(pk)
+            yield User(
+                pk=pk, username=f'{self.faker.user_name()}_{pk}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                email=f'user{pk}@{self.faker.free_email_domain()}',
+                password=password, date_joined=self.start)
+
+    def groups(self):
+        first = _max_pk(Group) + 1
+        for pk in range(first, first + self.counts['groups']):
+            self.group_ids.append(pk)
+            yield Group(pk=pk, title=self.faker.sentence(nb_words=3)[:200],
+                        slug=f'group-{pk}', description=self.text(2))
+
+    def posts(self):
+        authors = self.ranked(self.user_ids)
+        author_weights = zipf(len(authors), AUTHOR_SKEW)
+        groups = self.ranked(self.group_ids)
+        group_weights = zipf(len(groups), GROUP_SKEW)
+        first = _max_pk(Post) + 1
+        for pk in range(first, first + self.counts['posts']):
+            author, = self.random.choices(authors, cum_weights=author_weights)
+            group = (None if self.random.random() < NO_GROUP else
+                     self.random.choices(groups, cum_weights=group_weights)[0])
+            pub_date = self.date_after(self.start)
+            self.post_ids.append(pk)
+            self.post_dates.append(pub_date)
+            yield Post(pk=pk, author_id=author, group_id=group,
+                       pub_date=pub_date,
+                       text=self.text(self.random.randint(1, 8)))
+
+    def comments(self):
+        posts = self.ranked(range(len(self.post_ids)))
+        weights = zipf(len(posts), COMMENT_SKEW)
+        first = _max_pk(Comment) + 1
+        for pk in range(first, first + self.counts['comments']):
+            index, = self.random.choices(posts, cum_weights=weights)
+            yield Comment(pk=pk, post_id=self.post_ids[index],
+                          author_id=self.random.choice(self.user_ids),
+                          pub_date=self.date_after(self.post_dates[index]),
+                          text=self.text(self.random.randint(1, 3)))
+
+    def follows(self):
+        """Подписки со степенным распределением числа подписчиков.
+
+        У популярных авторов подписчики быстро кончаются, поэтому
+        попыток ограниченное число и подписок может выйти чуть меньше.
+        """
+        authors = self.ranked(self.user_ids)
+        weights = zipf(len(authors), FOLLOW_SKEW)
+        wanted = self.counts['follows']
+        pairs = set()
+        for _ in range(wanted * 4):
+            if len(pairs) >= wanted:
+                break
+            author, = self.random.choices(authors, cum_weights=weights)
+            user = self.random.choice(self.user_ids)
+            if user != author and (user, author) not in pairs:
+                pairs.add((user, author))
+                yield Follow(user_id=user, author_id=author)
+
+
+def batches(objects, size):
+    """Делит поток объектов на списки по size."""
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, size))
+        if not batch:
+            return
+        yield batch
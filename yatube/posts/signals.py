@@ -0,0 +1,106 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import counters, feed, versions
+from .models import Comment, Follow, Group, Post, User, UserStats
+from .utils import count_key, invalidate_counts
+
+
+def invalidate_post_counts(post, *group_ids):
+    """Сбрасывает закэшированное число постов лент, где есть пост."""
+    invalidate_counts(
+        count_key('all'), count_key('author', post.author_id),
+        *(count_key('group', pk) for pk in group_ids if pk is not None))
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        UserStats.objects.bulk_create([UserStats(user=instance)],
+                                      ignore_conflicts=True)
+    elif update_fields != frozenset(['last_login']):
+        # имена авторов видны на всех страницах
+        versions.touch(versions.version_key('site'))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    versions.touch(versions.version_key('site'))
+
+
+@receiver(post_init, sender=Post)
+def post_loaded(sender, instance, **kwargs):
+    # запоминаем группу, чтобы при смене сбросить счётчик старой;
+    # читаем __dict__, чтобы не догружать отложенное поле из .only()
+    instance._loaded_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def post_published(sender, instance, created, **kwargs):
+    # новый пост сразу попадает в ленты подписчиков
+    if created:
+        counters.bump_user(instance.author_id, 'posts_count', 1)
+        feed.fan_out_post(instance)
+        invalidate_post_counts(instance, instance.group_id)
+    elif instance._loaded_group_id != instance.group_id:
+        invalidate_post_counts(instance, instance._loaded_group_id,
+                               instance.group_id)
+    versions.touch_post(instance, instance._loaded_group_id,
+                        instance.group_id)
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'posts_count', -1)
+    invalidate_post_counts(instance, instance.group_id)
+    feed.forget_post(instance)
+    versions.touch_post(instance, instance.group_id)
+
+
+def touch_comment_post(comment):
+    # число комментариев видно везде, где виден пост
+    post = Post.objects.filter(pk=comment.post_id).only(
+        'author_id', 'group_id').first()
+    if post is not None:
+        versions.touch_post(post, post.group_id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_post(instance.post_id, 1)
+    touch_comment_post(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.bump_post(instance.post_id, -1)
+    touch_comment_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        counters.bump_user(instance.author_id, 'followers_count', 1)
+        counters.bump_user(instance.user_id, 'following_count', 1)
+        feed.backfill(instance.user_id, instance.author_id)
+        touch_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    counters.bump_user(instance.author_id, 'followers_count', -1)
+    counters.bump_user(instance.user_id, 'following_count', -1)
+    feed.purge(instance.user_id, instance.author_id)
+    touch_follow(instance)
+
+
+def touch_follow(follow):
+    # счётчики подписок и кнопка «Подписаться» в профилях обоих
+    usernames = User.objects.filter(
+        pk__in=(follow.user_id, follow.author_id)
+    ).values_list('username', flat=True)
+    versions.touch(*(versions.version_key('author', name)
+                     for name in usernames))
@@ -0,0 +1,31 @@
+from django import template
+
+from posts import fragments
+
+register = template.Library()
+
+
+class PostFragmentNode(template.Node):
+    def __init__(self, nodelist, post):
+        self.nodelist = nodelist
+        self.post = post
+
+    def render(self, context):
+        return fragments.cached_card(context, self.post.resolve(context),
+                                     lambda: self.nodelist.render(context))
+
+
+@register.tag('postfragment')
+def do_postfragment(parser, token):
+    """Кэширует карточку поста по ключу из posts.fragments.
+
+    {% postfragment post %}...{% endpostfragment %}
+    Если view положила в контекст fragment_batch, карточки всей
+    страницы читаются из кэша одним запросом.
+    """
+    nodelist = parser.parse(('endpostfragment',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) != 2:
+        raise template.TemplateSyntaxError(f'{tokens[0]} ждёт пост')
+    return PostFragmentNode(nodelist, parser.compile_filter(tokens[1]))
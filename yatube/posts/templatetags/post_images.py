@@ -0,0 +1,20 @@
+from django import template
+
+from posts import thumbnails
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def post_picture(context, post):
+    """Готовые варианты картинки поста или None, пока они создаются.
+
+    Если view положила в контекст thumbnail_batch, картинки всей
+    страницы берутся из него одним запросом.
+    """
+    if not post.image:
+        return None
+    batch = context.get('thumbnail_batch')
+    if batch is not None:
+        return batch.get(post)
+    return thumbnails.pictures_for([post.pk]).get(post.pk)
@@ -0,0 +1,66 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+MORE = re.compile(r'href="([^"]+)">\s*Показать ещё комментарии')
+
+
+@override_settings(COMMENTS_PER_PAGE=20)
+class CommentPagesTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='commenter')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        for number in range(25):
+            Comment.objects.create(post=self.post, author=self.user,
+                                   text=f'Комментарий №{number}')
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_first_page_is_embedded(self):
+        '''На странице поста 20 новых комментариев и ссылка на остальные'''
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['comments']), 20)
+        self.assertContains(response, 'Комментарий №24')
+        self.assertNotContains(response, 'Комментарий №4<')
+        self.assertContains(response, 'Комментариев:  <span > 25 </span>',
+                            html=False)
+        self.assertFalse(any('COUNT(' in query['sql']
+                             for query in queries.captured_queries))
+        self.assertRegex(response.content.decode(), MORE)
+
+    def test_next_page_fragment(self):
+        '''Фрагмент продолжает список без шаблона страницы'''
+        page = self.client.get(self.url).content.decode()
+        fragment = self.client.get(MORE.search(page).group(1))
+        self.assertEqual(fragment.status_code, 200)
+        text = fragment.content.decode()
+        self.assertNotIn('<html', text)
+        self.assertEqual(text.count('Комментарий №'), 5)
+        self.assertIn('Комментарий №0', text)
+        self.assertNotRegex(text, MORE)
+
+    def test_fragment_revalidates(self):
+        url = reverse('posts:comment_list', kwargs={'post_id': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Comment.objects.create(post=self.post, author=self.user,
+                               text='Новый')
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_fragment_of_missing_post_is_404(self):
+        '''Как и страница поста, фрагмент несуществующего поста — 404'''
+        url = reverse('posts:comment_list', kwargs={'post_id': 999999})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def stats(self, user):
+        return UserStats.objects.get(user=user)
+
+    def test_write_paths_update_counters(self):
+        '''Посты, комментарии и подписки сдвигают счётчики'''
+        self.client.post(reverse('posts:add_comment',
+                                 kwargs={'post_id': self.post.pk}),
+                         {'text': 'Комментарий'})
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': self.author.username}))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': self.author.username}))
+        Comment.objects.all().delete()
+        Post.objects.create(author=self.author, text='Второй пост')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+        self.assertEqual(self.stats(self.author).posts_count, 2)
+        self.assertEqual(self.stats(self.author).followers_count, 0)
+        self.assertEqual(self.stats(self.reader).following_count, 0)
+
+    def test_recount_repairs_drift(self):
+        '''recount чинит счётчики, разошедшиеся с данными'''
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserStats.objects.update(posts_count=7, followers_count=0)
+        Post.objects.update(comments_count=5)
+        UserStats.objects.filter(user=self.reader).delete()
+        out = StringIO()
+        call_command('recount', batch_size=1, stdout=out)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        self.assertEqual(self.stats(self.author).posts_count, 1)
+        self.assertEqual(self.stats(self.author).followers_count, 1)
+        self.assertEqual(self.stats(self.reader).following_count, 1)
+        self.assertIn('пользователей 2, постов 1', out.getvalue())
+
+    def test_pages_render_counts_without_aggregates(self):
+        '''Профиль и пост выводят счётчики без COUNT-запросов'''
+        pages = (reverse('posts:profile',
+                         kwargs={'username': self.author.username}),
+                 reverse('posts:post_detail',
+                         kwargs={'post_id': self.post.pk}))
+        for url in pages:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.context['post_count'], 1)
+                sql = ' '.join(q['sql'] for q in queries).upper()
+                self.assertNotIn('COUNT(', sql)
@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import FeedItem, Follow, Post
+from ..utils import count_key
+
+User = get_user_model()
+
+
+class FeedTest(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='writer')
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed_posts(self, params=None):
+        response = self.client.get(reverse('posts:follow_index'), params)
+        return response.context['page_obj']
+
+    def test_new_post_is_fanned_out(self):
+        '''Новый пост автора сразу попадает в ленту подписчика'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post=post, pub_date=post.pub_date).exists())
+        self.assertIn(post, self.feed_posts())
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        '''Подписка добавляет старые посты, отписка их убирает'''
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        self.client.get(reverse('posts:profile_follow',
+                                kwargs={'username': self.author.username}))
+        self.assertIn(old, self.feed_posts())
+        self.client.get(reverse('posts:profile_unfollow',
+                                kwargs={'username': self.author.username}))
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+        self.assertEqual(len(self.feed_posts()), 0)
+
+    def test_deleted_post_resets_feed_count(self):
+        '''Удалённый пост сбрасывает число записей ленты подписчика'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Удалится')
+        # число записей кэширует пагинация со смещением (?page=N)
+        self.assertEqual(self.feed_posts({'page': 1}).paginator.count, 1)
+        post.delete()
+        self.assertIsNone(cache.get(count_key('feed', self.reader.pk)))
+        self.assertEqual(self.feed_posts({'page': 1}).paginator.count, 0)
+
+    def test_feed_cursor_pages(self):
+        '''Лента листается курсором по записям FeedItem'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        Post.objects.bulk_create(
+            Post(author=self.author, text=f'Пост {i}')
+            for i in range(settings.POSTS_PER_PAGE + 2))
+        call_command('rebuild_feed', stdout=StringIO())
+        first = self.feed_posts()
+        second = self.feed_posts({'after': first.next_cursor})
+        self.assertEqual(len(first), settings.POSTS_PER_PAGE)
+        self.assertEqual(len(second), 2)
+        self.assertIsInstance(second[0], Post)
+        self.assertFalse(set(first) & set(second))
+
+    def test_rebuild_feed_command(self):
+        '''rebuild_feed восстанавливает потерянные записи'''
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        FeedItem.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertEqual(
+            list(FeedItem.objects.values_list('user', 'post')),
+            [(self.reader.pk, post.pk)])
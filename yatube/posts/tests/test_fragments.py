@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import fragments
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+# карточки собираются при каждом рендеринге, без кэша страниц
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class PostFragmentTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        self.posts = [Post.objects.create(author=self.author,
+                                          text=f'Пост {number}')
+                      for number in range(3)]
+        self.url = reverse('posts:profile',
+                           kwargs={'username': self.author.username})
+
+    def key(self, post):
+        post.refresh_from_db()
+        return fragments.fragment_key(post)
+
+    def test_cached_fragment_is_served(self):
+        '''Второй показ страницы берёт карточку из кэша'''
+        self.client.get(self.url)
+        post = self.posts[0]
+        self.assertIn('Пост 0', cache.get(self.key(post)))
+        cache.set(self.key(post), '<p>из кэша</p>')
+        self.assertContains(self.client.get(self.url), '<p>из кэша</p>')
+
+    def test_one_get_many_and_one_set_many_per_page(self):
+        with mock.patch.object(fragments, 'cache', wraps=cache) as spy:
+            self.client.get(self.url)
+            self.client.get(self.url)
+        self.assertEqual(spy.get_many.call_count, 2)
+        self.assertEqual(spy.set_many.call_count, 1)
+        self.assertEqual(len(spy.set_many.call_args[0][0]), 3)
+
+    def test_changes_give_new_key(self):
+        '''Правка поста, имени автора или группы меняют ключ карточки'''
+        post = self.posts[0]
+        self.client.get(self.url)
+        old = self.key(post)
+        group = Group.objects.create(title='Группа', slug='group')
+        changes = (
+            lambda: Post.objects.filter(pk=post.pk).update(text='Новый'),
+            lambda: User.objects.filter(pk=self.author.pk).update(
+                first_name='Алексей'),
+            lambda: Post.objects.filter(pk=post.pk).update(group=group),
+        )
+        for change in changes:
+            change()
+            self.assertNotEqual(self.key(post), old)
+            old = self.key(post)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Алексей Толстой')
+        self.assertContains(response, 'Новый')
+
+    def test_pending_picture_is_not_cached(self):
+        '''Карточку с заглушкой вместо картинки не кэшируем'''
+        post = Post.objects.create(author=self.author, text='С картинкой',
+                                   image='posts/pending.png')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Картинка обрабатывается')
+        self.assertIsNone(cache.get(fragments.fragment_key(post)))
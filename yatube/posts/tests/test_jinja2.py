@@ -0,0 +1,73 @@
+import importlib.util
+import re
+import unittest
+from io import StringIO
+
+from django import forms
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def visible_text(html):
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    return ' '.join(re.sub(r'<[^>]+>', ' ', html).split())
+
+
+@unittest.skipUnless(importlib.util.find_spec('jinja2'),
+                     'Jinja2 не установлен')
+class Jinja2TemplatesTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Про <b>всё</b>')
+        for number in range(15):
+            Post.objects.create(author=self.author, group=self.group,
+                                text=f'Пост <{number}>')
+        Follow.objects.create(user=self.reader, author=self.author)
+        # вне INTERNAL_IPS: без панели debug toolbar
+        self.client = Client(REMOTE_ADDR='192.0.2.1')
+        self.client.force_login(self.reader)
+
+    def get(self, url, engine):
+        cache.clear()
+        with override_settings(POSTS_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_pages_match_django_templates(self):
+        '''Страницы на Jinja2 показывают то же, что шаблоны Django'''
+        urls = (reverse('posts:index'), reverse('posts:index') + '?page=2',
+                reverse('posts:group_list', kwargs={'slug': 'group'}),
+                reverse('posts:profile', kwargs={'username': 'author'}),
+                reverse('posts:follow_index'))
+        for url in urls:
+            with self.subTest(url=url):
+                jinja = self.get(url, 'jinja2')
+                self.assertIn('<p>Пост &lt;', jinja)
+                self.assertEqual(visible_text(jinja),
+                                 visible_text(self.get(url, None)))
+
+    def test_addclass_filter(self):
+        class NameForm(forms.Form):
+            name = forms.CharField()
+
+        template = engines['jinja2'].from_string(
+            "{{ form['name']|addclass('form-control') }}")
+        self.assertIn('class="form-control"',
+                      template.render({'form': NameForm()}))
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_templates', iterations=1, sizes=[2], stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
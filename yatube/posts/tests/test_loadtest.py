@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, TransactionTestCase
+
+from .. import loadtest
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class LoadTestHelpersTest(TestCase):
+    def test_percentile_nearest_rank(self):
+        ordered = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(ordered, 0.5), 50)
+        self.assertEqual(loadtest.percentile(ordered, 0.99), 99)
+        self.assertEqual(loadtest.percentile([7], 0.95), 7)
+        self.assertIsNone(loadtest.percentile([], 0.5))
+
+    def test_parse_mix(self):
+        self.assertEqual(loadtest.parse_mix('index=3,post_detail'),
+                         {'index': 3.0, 'post_detail': 1.0})
+        for text in ('unknown=1', 'index=0'):
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    loadtest.parse_mix(text)
+
+
+class LoadTestRunTest(TransactionTestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username='reader',
+                                               password='secret')
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        Post.objects.create(author=author, group=group, text='Пост')
+        from yatube.wsgi import application
+        self.transport = loadtest.WSGITransport(application)
+
+    def run_mix(self, mix, **options):
+        return loadtest.LoadTest(self.transport, mix, workers=1,
+                                 duration=0.3, **options).run()
+
+    def test_guest_reads(self):
+        '''Отчёт по каждому маршруту смеси, гостевые чтения без ошибок'''
+        report = self.run_mix({'index': 1, 'group_list': 1, 'profile': 1,
+                               'post_detail': 1, 'follow_index': 1})
+        self.assertEqual(set(report['routes']),
+                         {'index', 'group_list', 'profile', 'post_detail'})
+        self.assertEqual(report['total']['error_rate'], 0)
+        for stats in report['routes'].values():
+            self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+            self.assertGreater(stats['rps'], 0)
+
+    def test_logged_in_writes(self):
+        '''Вошедший посетитель пишет с CSRF-токеном из cookie'''
+        report = self.run_mix({'add_comment': 1, 'profile_follow': 1,
+                               'post_create': 1},
+                              accounts=['reader'], password='secret')
+        self.assertEqual(report['total']['error_rate'], 0)
+        self.assertTrue(Comment.objects.filter(author=self.reader).exists())
+        self.assertTrue(Follow.objects.filter(user=self.reader).exists())
+
+    def test_wrong_password_stops_run(self):
+        with self.assertRaises(RuntimeError):
+            self.run_mix({'index': 1}, accounts=['reader'],
+                         password='wrong')
@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from .utils import QueryBudgetMixin
+
+User = get_user_model()
+
+
+class QueryBudgetTest(QueryBudgetMixin, TestCase):
+    '''Списки загружаются постоянным числом запросов'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='budget')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}',
+                                     first_name=f'Имя{i}')
+            for i in range(3)]
+        for i in range(12):
+            cls.post = Post.objects.create(
+                author=cls.authors[i % 3], group=cls.group,
+                text=f'Пост {i}')
+            Comment.objects.create(post=cls.post,
+                                   author=cls.authors[(i + 1) % 3],
+                                   text=f'Комментарий {i}')
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_guest_pages(self):
+        # первый запрос — версии страницы для ETag (posts.versions)
+        budgets = {
+            reverse('posts:index'): 2,
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}): 3,
+            reverse('posts:profile',
+                    kwargs={'username': self.authors[0].username}): 3,
+        }
+        for url, budget in budgets.items():
+            self.assertQueryBudget(self.guest_client, url, budget)
+
+    def test_authorized_pages(self):
+        # сессия и пользователь — ещё два запроса к любой странице
+        budgets = {
+            reverse('posts:index'): 4,
+            reverse('posts:follow_index'): 3,
+            reverse('posts:profile',
+                    kwargs={'username': self.authors[0].username}): 6,
+        }
+        for url, budget in budgets.items():
+            self.assertQueryBudget(self.authorized_client, url, budget)
+
+    def test_post_detail_comments(self):
+        '''Авторы комментариев грузятся вместе с комментариями'''
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        # первые запросы — автор поста и версии для ETag (posts.versions)
+        self.assertEqual(self.count_queries(self.guest_client, url), 4)
+        for i in range(5):
+            Comment.objects.create(post=self.post, author=self.authors[i % 3],
+                                   text=f'Ещё комментарий {i}')
+        self.assertEqual(self.count_queries(self.guest_client, url), 4)
@@ -0,0 +1,115 @@
+import re
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# полный проход по таблице: «SCAN table» без «USING ... INDEX»
+FULL_SCAN = re.compile(r'^SCAN (?!.*USING)')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite',
+                     'EXPLAIN QUERY PLAN есть только в SQLite')
+class QueryPlanTest(TestCase):
+    '''Запросы страниц posts/views.py идут по индексам, без сортировок'''
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='plans')
+        for i in range(settings.POSTS_PER_PAGE + 1):
+            cls.post = Post.objects.create(author=cls.author,
+                                           group=cls.group,
+                                           text=f'Пост {i}')
+        Comment.objects.create(post=cls.post, author=cls.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def plans(self, url, params=None):
+        '''SQL всех SELECT-запросов страницы и их планы'''
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, params).status_code, 200)
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                yield sql, [row[-1] for row in cursor.fetchall()]
+
+    def assertIndexedPlans(self, url, params=None):
+        for sql, plan in self.plans(url, params):
+            with self.subTest(url=url, sql=sql):
+                for step in plan:
+                    self.assertIsNone(FULL_SCAN.match(step),
+                                      f'полный проход таблицы: {plan}')
+                    self.assertNotIn('TEMP B-TREE', step,
+                                     f'сортировка без индекса: {plan}')
+
+    def test_feed_pages(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+        )
+        for url in pages:
+            self.assertIndexedPlans(url)
+
+    def test_next_cursor_pages(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}),
+            reverse('posts:follow_index'),
+        )
+        for url in pages:
+            page_obj = self.client.get(url).context['page_obj']
+            self.assertIndexedPlans(url, {'after': page_obj.next_cursor})
+
+    def test_write_views(self):
+        '''Подписка, отписка и комментарий не сканируют таблицы'''
+        requests = (
+            (self.client.get, reverse(
+                'posts:profile_unfollow',
+                kwargs={'username': self.author.username}), None),
+            (self.client.get, reverse(
+                'posts:profile_follow',
+                kwargs={'username': self.author.username}), None),
+            (self.client.post, reverse(
+                'posts:add_comment', kwargs={'post_id': self.post.pk}),
+             {'text': 'Комментарий'}),
+        )
+        for send, url, data in requests:
+            with CaptureQueriesContext(connection) as queries:
+                send(url, data)
+            with connection.cursor() as cursor:
+                for query in queries:
+                    if not query['sql'].startswith(('SELECT', 'DELETE')):
+                        continue
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plan = [row[-1] for row in cursor.fetchall()]
+                    with self.subTest(url=url, sql=query['sql']):
+                        self.assertFalse(
+                            any(FULL_SCAN.match(step) for step in plan),
+                            plan)
+        self.assertEqual(self.post.comments.count(), 2)
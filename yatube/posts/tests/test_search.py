@@ -0,0 +1,118 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(username='seeker')
+        self.cats = Post.objects.create(author=self.user,
+                                        text='Мои котики любят ёлки')
+        self.dogs = Post.objects.create(author=self.user,
+                                        text='Собаки гуляют <b>во дворе</b>')
+
+    def found(self, query, **params):
+        response = self.client.get(reverse('posts:search'),
+                                   {'q': query, **params})
+        return response.context['page_obj']
+
+    def test_light_stem(self):
+        cases = {'котиков': 'котик', 'Котики': 'котик', 'ёлки': 'елк',
+                 'кот': 'кот', 'django': 'django'}
+        for word, stem in cases.items():
+            with self.subTest(word=word):
+                self.assertEqual(search.light_stem(word), stem)
+        self.assertEqual(search.match_query('котики "OR" *'),
+                         '"котик"* "or"*')
+        self.assertIsNone(search.match_query(' !? '))
+
+    def test_inflected_and_yo_forms_are_found(self):
+        '''Другая форма слова и «е» вместо «ё» находят пост'''
+        for query in ('котиков', 'КОТИК', 'елка', 'ёлками'):
+            with self.subTest(query=query):
+                self.assertEqual(list(self.found(query)), [self.cats])
+
+    def test_triggers_follow_posts_and_comments(self):
+        '''Индекс обновляется при изменении постов и комментариев'''
+        comment = Comment.objects.create(post=self.dogs, author=self.user,
+                                         text='Какая хорошая черепаха')
+        self.assertEqual(list(self.found('черепахи')), [self.dogs])
+        comment.delete()
+        self.assertEqual(list(self.found('черепахи')), [])
+        Post.objects.filter(pk=self.cats.pk).update(text='Про черепах')
+        self.assertEqual(list(self.found('черепаха')), [self.cats])
+        self.cats.delete()
+        self.assertEqual(list(self.found('черепаха')), [])
+
+    def test_new_comment_is_appended(self):
+        '''Триггер дописывает комментарий так же, как пересборка индекса'''
+        for text in ('Первый ёж', 'Второй', 'Третий'):
+            Comment.objects.create(post=self.dogs, author=self.user,
+                                   text=text)
+
+        def indexed():
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT comments FROM {search.TABLE} '
+                               f'WHERE rowid = %s', [self.dogs.pk])
+                return cursor.fetchone()[0]
+        appended = indexed()
+        self.assertEqual(appended, 'Первый еж Второй Третий')
+        search.rebuild()
+        self.assertEqual(indexed(), appended)
+
+    def test_post_text_ranks_above_comments(self):
+        Comment.objects.create(post=self.dogs, author=self.user,
+                               text='А у меня котики')
+        self.assertEqual(list(self.found('котики')), [self.cats, self.dogs])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        response = self.client.get(reverse('posts:search'),
+                                   {'q': 'дворе'})
+        self.assertContains(response, '&lt;b&gt;во <mark>дворе</mark>')
+        self.assertNotContains(response, '<b>во')
+
+    @override_settings(POSTS_PER_PAGE=2)
+    def test_cursor_walk(self):
+        '''Выдача листается курсором без повторов и пропусков'''
+        for i in range(5):
+            Post.objects.create(author=self.user, text=f'Собака номер {i}')
+        seen, params = [], {}
+        while True:
+            page_obj = self.found('собака', **params)
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                break
+            params = {'after': page_obj.next_cursor}
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+        back = self.found('собака', before=page_obj.previous_cursor)
+        self.assertTrue(back.has_next())
+        response = self.client.get(reverse('posts:search'), {'q': 'собака'})
+        self.assertContains(response, '?q=%D1%81%D0%BE%D0%B1%D0%B0%D0%BA'
+                                      '%D0%B0&amp;after=')
+
+    def test_admin_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:posts_post_changelist'),
+                                   {'q': 'котиков'})
+        self.assertEqual(list(response.context['cl'].result_list),
+                         [self.cats])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        self.assertEqual(list(self.found('котики')), [])
+        call_command('rebuild_search_index', chunk_size=1,
+                     stdout=StringIO())
+        self.assertEqual(list(self.found('котики')), [self.cats])
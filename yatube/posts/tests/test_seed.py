@@ -0,0 +1,55 @@
+from collections import Counter
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+
+from ..models import Comment, FeedItem, Follow, Group, Post, User, UserStats
+
+
+class SeedDataTest(TestCase):
+    def seed(self, seed=0):
+        call_command('seed_data', scale=0.05, seed=seed, stdout=StringIO())
+
+    def snapshot(self):
+        return list(Post.objects.order_by('pk').values_list(
+            'author_id', 'group_id', 'pub_date', 'text'))
+
+    def test_counts_and_derived_data(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 500)
+        self.assertEqual(Comment.objects.count(), 1500)
+        self.assertGreater(Follow.objects.count(), 500)
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')).exists())
+        self.assertEqual(UserStats.objects.count(), 50)
+        self.assertTrue(FeedItem.objects.exists())
+        user = User.objects.first()
+        self.assertTrue(user.check_password('seed-password'))
+        for comment in Comment.objects.select_related('post')[:50]:
+            self.assertGreaterEqual(comment.pub_date, comment.post.pub_date)
+
+    def test_posts_per_author_are_skewed(self):
+        '''Самый активный автор пишет в разы больше среднего'''
+        self.seed()
+        per_author = Counter(Post.objects.values_list('author_id',
+                                                      flat=True))
+        self.assertGreater(max(per_author.values()), 500 / 50 * 3)
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed()
+        second = self.snapshot()
+        self.assertEqual([row[2:] for row in first],
+                         [row[2:] for row in second])
+        Post.objects.all().delete()
+        self.seed(seed=1)
+        self.assertNotEqual([row[3] for row in first],
+                            [row[3] for row in self.snapshot()])
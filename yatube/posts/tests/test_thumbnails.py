@@ -0,0 +1,166 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from core import tasks
+from core.models import Task
+
+from .. import thumbnails
+from ..models import ImageVariant, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(name='pic.png', size=(700, 300)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(),
+                              content_type='image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='painter')
+        self.post = Post.objects.create(author=self.user, text='С картинкой',
+                                        image=make_image())
+        self.client = Client()
+        self.url = reverse('posts:post_detail',
+                           kwargs={'post_id': self.post.pk})
+
+    def test_placeholder_until_generated(self):
+        '''Пока копий нет, страница показывает заглушку'''
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Картинка обрабатывается')
+        self.assertNotContains(response, '<picture>')
+
+    def test_schedule_enqueues_task(self):
+        '''schedule() ставит задачу, воркер создаёт копии'''
+        thumbnails.schedule(self.post)
+        item = Task.objects.get()
+        self.assertEqual(item.name, 'posts.thumbnails.generate')
+        self.assertEqual(tasks.run(item.pk), tasks.DONE)
+        self.assertIn(self.post.pk, thumbnails.pictures_for([self.post.pk]))
+
+    def test_variants_for_each_width_and_format(self):
+        '''Кадр нужных пропорций во всех ширинах до исходной'''
+        thumbnails.generate(self.post.pk)
+        variants = ImageVariant.objects.filter(post=self.post)
+        expected = {(name, width) for name in thumbnails.formats()
+                    for width in (320, 640)}
+        self.assertEqual({(v.format, v.width) for v in variants}, expected)
+        for variant in variants:
+            with self.subTest(variant=variant.file.name):
+                with Image.open(variant.file.path) as image:
+                    self.assertEqual(image.format, variant.format)
+                    self.assertEqual(image.size,
+                                     (variant.width, variant.height))
+
+    def test_picture_markup(self):
+        '''Шаблон выводит <picture> с srcset для каждого формата'''
+        thumbnails.generate(self.post.pk)
+        response = self.client.get(self.url)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/webp"')
+        jpeg = ImageVariant.objects.get(post=self.post, format='JPEG',
+                                        width=640)
+        self.assertContains(response, f'src="{jpeg.file.url}"')
+        self.assertContains(response, f'{jpeg.file.url} 640w')
+        self.assertNotContains(response, 'Картинка обрабатывается')
+
+    def test_broken_upload_is_dropped(self):
+        '''Файл, который не декодируется, убирается из поста, но остаётся'''
+        self.post.image = SimpleUploadedFile('broken.png', b'not an image')
+        self.post.save()
+        path = self.post.image.path
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+        self.assertTrue(os.path.exists(path))
+
+    def test_variants_outside_formats_show_original(self):
+        '''Копии не в POST_IMAGE_FORMATS — показывается исходная картинка'''
+        thumbnails.generate(self.post.pk)
+        with self.settings(POST_IMAGE_FORMATS=('GIF',)):
+            response = self.client.get(self.url)
+            index = self.client.get(reverse('posts:index'))
+        self.assertNotContains(response, '<picture>')
+        self.assertContains(response, f'src="{self.post.image.url}"')
+        self.assertContains(index, f'src="{self.post.image.url}"')
+
+    def test_replaced_image_hides_old_variants(self):
+        '''После замены картинки старые копии не показываются и удаляются'''
+        thumbnails.generate(self.post.pk)
+        old = list(ImageVariant.objects.filter(post=self.post))
+        self.post.image = make_image('new.png')
+        self.post.save()
+        self.assertNotContains(self.client.get(self.url), '<picture>')
+        thumbnails.generate(self.post.pk)
+        self.assertContains(self.client.get(self.url), '<picture>')
+        for variant in old:
+            self.assertFalse(os.path.exists(variant.file.path))
+
+    def test_regenerated_variants_refresh_cached_card(self):
+        '''Карточка в кэше не ссылается на удалённые копии'''
+        url = reverse('posts:profile', args=[self.user.username])
+        thumbnails.generate(self.post.pk)
+        old = [variant.file for variant in
+               ImageVariant.objects.filter(post=self.post)]
+        self.assertContains(self.client.get(url), old[0].url)
+        thumbnails.generate(self.post.pk)
+        response = self.client.get(url)
+        for variant in ImageVariant.objects.filter(post=self.post):
+            self.assertContains(response, variant.file.url)
+        for file in old:
+            self.assertNotContains(response, file.url)
+
+    def test_command_backfills_existing_posts(self):
+        call_command('generate_thumbnails', stdout=StringIO())
+        self.assertIn(self.post.pk, thumbnails.pictures_for([self.post.pk]))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT,
+                   POST_IMAGE_FORMATS=('WEBP', 'JPEG'))
+class ThumbnailBatchTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='batch')
+        self.posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i}',
+                                image=make_image(f'batch{i}.png'))
+            for i in range(3)]
+        for post in self.posts[:2]:
+            thumbnails.generate(post.pk)
+
+    def test_page_resolves_pictures_in_one_query(self):
+        '''Картинки страницы загружаются одним запросом'''
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:profile', kwargs={
+                'username': self.user.username}))
+        variant_queries = [q for q in queries
+                           if 'posts_imagevariant' in q['sql']]
+        self.assertEqual(len(variant_queries), 1)
+        self.assertContains(response, '<picture>', 2)
+        self.assertContains(response, 'Картинка обрабатывается', 1)
@@ -0,0 +1,124 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models.expressions import RawSQL
+from django.test import TestCase
+
+from .. import search, transfer
+from ..models import Comment, FeedItem, Follow, Group, Post, UserStats
+from ..utils import count_key
+
+User = get_user_model()
+
+
+class TransferTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='writer')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group',
+                                          description='Описание')
+        self.post = Post.objects.create(author=self.author, group=self.group,
+                                        text='Перенос котиков')
+        Post.objects.create(author=self.reader, text='Второй пост')
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Хорошая черепаха')
+        Follow.objects.create(user=self.reader, author=self.author)
+        directory = tempfile.mkdtemp()
+        self.path = os.path.join(directory, 'dump.jsonl')
+        self.addCleanup(lambda: [os.remove(os.path.join(directory, name))
+                                 for name in os.listdir(directory)])
+
+    def export(self):
+        call_command('export_posts', output=self.path, stdout=StringIO())
+        with open(self.path, encoding='utf-8') as dump:
+            return dump.readlines()
+
+    def wipe(self):
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+
+    def load(self, **options):
+        out = StringIO()
+        call_command('import_posts', self.path, batch_size=2,
+                     stdout=out, **options)
+        return out.getvalue()
+
+    def test_round_trip_rebuilds_derived_data(self):
+        '''После выгрузки и загрузки в пустую базу данные те же,
+        а ленты, счётчики и поиск пересобраны'''
+        lines = self.export()
+        self.assertEqual(len(lines), 7)
+        snapshot = {model: list(model.objects.order_by('pk').values())
+                    for model in (User, Group, Post, Comment, Follow)}
+        self.wipe()
+        self.load()
+        for model, rows in snapshot.items():
+            with self.subTest(model=model.__name__):
+                self.assertEqual(
+                    list(model.objects.order_by('pk').values()), rows)
+        self.assertEqual(Post.objects.get(pk=self.post.pk).comments_count, 1)
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertTrue(FeedItem.objects.filter(
+            user=self.reader, post_id=self.post.pk).exists())
+        self.assertEqual(self.search('черепаха'), [self.post.pk])
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+        # триггеры поиска снова работают, новые id не заняты
+        post = Post.objects.create(author=self.author, text='Новый ёжик')
+        self.assertGreater(post.pk, self.post.pk)
+        self.assertEqual(self.search('ежик'), [post.pk])
+
+    def test_resume_skips_loaded_batches(self):
+        '''--resume продолжает с позиции контрольной точки'''
+        lines = self.export()
+        self.wipe()
+        User.objects.create(pk=self.author.pk, username='writer')
+        User.objects.create(pk=self.reader.pk, username='reader')
+        offset = len(''.join(lines[:2]).encode())
+        with open(self.path + '.checkpoint', 'w') as checkpoint:
+            checkpoint.write(str(offset))
+        log = self.load(resume=True)
+        self.assertNotIn('auth.user', log)
+        self.assertIn('posts.post', log)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_repeated_load_does_not_duplicate(self):
+        self.export()
+        self.load()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_failed_import_restores_search_triggers(self):
+        '''После сбоя загрузки индекс собран, триггеры снова на месте'''
+        lines = self.export()
+        self.wipe()
+        with open(self.path, 'w', encoding='utf-8') as dump:
+            dump.writelines(lines[:6])
+            dump.write('{"model": "auth.group", "fields": {}}\n')
+        with self.assertRaises(ValueError):
+            self.load()
+        self.assertEqual(self.search('котиков'), [self.post.pk])
+        post = Post.objects.create(author=self.author, text='Новый ёжик')
+        self.assertEqual(self.search('ежик'), [post.pk])
+
+    def test_rebuild_derived_keeps_foreign_cache(self):
+        '''Сбрасываются только числа постов лент, не весь кэш'''
+        keys = (count_key('all'), count_key('group', self.group.pk),
+                count_key('author', self.author.pk),
+                count_key('feed', self.reader.pk))
+        cache.set_many({key: 100 for key in keys})
+        cache.set('other:app', 'значение')
+        self.addCleanup(cache.delete, 'other:app')
+        transfer.rebuild_derived(StringIO())
+        self.assertEqual(cache.get_many(keys), {})
+        self.assertEqual(cache.get('other:app'), 'значение')
+
+    def search(self, text):
+        sql, params = search.matching_ids(text)
+        return list(Post.objects.filter(pk__in=RawSQL(sql, params))
+                    .values_list('pk', flat=True))
@@ -0,0 +1,162 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..utils import (CachedCountPaginator, CursorPaginator, decode_cursor,
+                     encode_cursor)
+from .utils import replica_on_default
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class CursorPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='cursor')
+        cls.group = Group.objects.create(title='Тестовая группа',
+                                         slug='cursor_group')
+        # bulk_create ставит почти одинаковые pub_date —
+        # заодно проверяем, что id разбивает ничьи
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(settings.POSTS_PER_PAGE * 2 + 3))
+
+    def setUp(self):
+        self.client = Client()
+
+    def walk(self, url):
+        '''Проходит ленту по ссылкам «Следующая» до конца'''
+        seen = []
+        params = {}
+        while True:
+            page_obj = self.client.get(url, params).context['page_obj']
+            seen.extend(post.pk for post in page_obj)
+            if not page_obj.has_next():
+                return seen, page_obj
+            params = {'after': page_obj.next_cursor}
+
+    def test_cursor_walk_covers_all_posts_once(self):
+        '''Курсор проходит все посты по порядку без повторов'''
+        expected = list(Post.objects.order_by('-pub_date', '-id')
+                        .values_list('pk', flat=True))
+        pages = (reverse('posts:index'),
+                 reverse('posts:group_list',
+                         kwargs={'slug': self.group.slug}),
+                 reverse('posts:profile',
+                         kwargs={'username': self.user.username}))
+        for url in pages:
+            with self.subTest(url=url):
+                seen, last_page = self.walk(url)
+                self.assertEqual(seen, expected)
+                self.assertIsInstance(last_page.paginator, Paginator)
+                self.assertEqual(type(last_page), Page)
+
+    def test_before_returns_previous_page(self):
+        '''Токен before возвращает предыдущую страницу'''
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'after': first.next_cursor}).context['page_obj']
+        back = self.client.get(
+            url, {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+        self.assertTrue(second.has_previous())
+
+    def test_page_number_fallback(self):
+        '''Старые ссылки ?page=N работают через обычный Paginator'''
+        response = self.client.get(reverse('posts:index'), {'page': 3})
+        page_obj = response.context['page_obj']
+        self.assertNotIsInstance(page_obj.paginator, CursorPaginator)
+        self.assertEqual(page_obj.number, 3)
+        self.assertEqual(len(page_obj), 3)
+
+    def test_broken_cursor_gives_first_page(self):
+        '''Испорченный токен даёт первую страницу'''
+        response = self.client.get(reverse('posts:index'),
+                                   {'after': 'не-токен'})
+        page_obj = response.context['page_obj']
+        self.assertFalse(page_obj.has_previous())
+        self.assertEqual(len(page_obj), settings.POSTS_PER_PAGE)
+
+    def test_cursor_round_trip(self):
+        post = Post.objects.first()
+        fields = [Post._meta.get_field('pub_date'), Post._meta.get_field('id')]
+        token = encode_cursor([post.pub_date, post.id])
+        self.assertEqual(decode_cursor(token, fields),
+                         [post.pub_date, post.id])
+        self.assertIsNone(decode_cursor(token[:-3], fields))
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class CachedCountPaginatorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(username='counted')
+        self.group = Group.objects.create(title='Группа', slug='counted')
+        self.other = Group.objects.create(title='Другая', slug='other')
+        for i in range(3):
+            self.post = Post.objects.create(author=self.user,
+                                            group=self.group,
+                                            text=f'Пост {i}')
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'page': 1})
+        counts = [q for q in queries if 'COUNT(' in q['sql'].upper()]
+        return response.context['page_obj'].paginator.count, len(counts)
+
+    def test_count_is_cached_and_invalidated(self):
+        '''COUNT(*) выполняется один раз до изменения ленты'''
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        self.assertEqual(self.count_queries(url), (3, 1))
+        self.assertEqual(self.count_queries(url), (3, 0))
+        Post.objects.create(author=self.user, group=self.group, text='Ещё')
+        self.assertEqual(self.count_queries(url), (4, 1))
+        # пост ушёл в другую группу — счётчик старой группы сброшен
+        self.post.group = self.other
+        self.post.save()
+        self.assertEqual(self.count_queries(url), (3, 1))
+
+    def test_replica_count_is_not_cached(self):
+        '''Число постов с реплики не остаётся в кэше'''
+        url = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        with replica_on_default():
+            self.assertEqual(self.count_queries(url), (3, 1))
+            self.assertEqual(self.count_queries(url), (3, 1))
+        self.assertEqual(self.count_queries(url), (3, 1))
+        self.assertEqual(self.count_queries(url), (3, 0))
+
+    def test_elided_page_range(self):
+        paginator = CachedCountPaginator(Post.objects.none(), 1)
+        paginator.count = 50
+        E = paginator.ELLIPSIS
+        cases = {
+            1: [1, 2, 3, 4, E, 50],
+            25: [1, E, 22, 23, 24, 25, 26, 27, 28, E, 50],
+            50: [1, E, 47, 48, 49, 50],
+        }
+        for number, expected in cases.items():
+            with self.subTest(number=number):
+                self.assertEqual(
+                    list(paginator.get_elided_page_range(number)), expected)
+
+    @override_settings(POSTS_PER_PAGE=1)
+    def test_template_renders_window_only(self):
+        '''Шаблон выводит окно номеров, а не все страницы'''
+        for i in range(30):
+            Post.objects.create(author=self.user, text=f'Пост {i}')
+        response = self.client.get(reverse('posts:index'), {'page': 15})
+        self.assertEqual(response.context['page_obj'].elided_range,
+                         [1, '…', 12, 13, 14, 15, 16, 17, 18, '…', 33])
+        self.assertNotContains(response, '?page=2"')
+        self.assertContains(response, '?page=33"')
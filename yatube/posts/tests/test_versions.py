@@ -0,0 +1,135 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, PageVersion, Post
+from .utils import replica_on_default
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.group = Group.objects.create(title='Группа', slug='versions')
+        self.post = Post.objects.create(author=self.author, group=self.group,
+                                        text='Пост')
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_list',
+                             kwargs={'slug': self.group.slug}),
+            'profile': reverse('posts:profile',
+                               kwargs={'username': self.author.username}),
+            'detail': reverse('posts:post_detail',
+                              kwargs={'post_id': self.post.pk}),
+        }
+
+    def age_versions(self):
+        # изменения «в прошлом»: иначе Last-Modified не отдаётся
+        PageVersion.objects.update(
+            changed=timezone.now() - timedelta(seconds=10))
+
+    def revalidate(self, client, url, response):
+        return client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_unchanged_page_is_not_rendered(self):
+        '''Повторный запрос с ETag — 304 без шаблонов и запросов к постам'''
+        self.age_versions()
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                response = self.guest_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('Last-Modified', response)
+                with CaptureQueriesContext(connection) as queries:
+                    again = self.revalidate(self.guest_client, url,
+                                            response)
+                self.assertEqual(again.status_code, 304)
+                self.assertFalse(again.templates)
+                # версии и, для страницы поста, её автор
+                self.assertLessEqual(len(queries), 2)
+
+    def test_if_modified_since(self):
+        self.age_versions()
+        url = self.urls['index']
+        response = self.guest_client.get(url)
+        again = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_no_last_modified_in_the_same_second(self):
+        '''Изменение в текущую секунду — только ETag'''
+        response = self.guest_client.get(self.urls['index'])
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('ETag', response)
+
+    def test_versions_do_not_depend_on_cache(self):
+        '''Версии в БД: очистка кэша процесса не меняет ETag'''
+        url = self.urls['index']
+        response = self.guest_client.get(url)
+        cache.clear()
+        self.assertEqual(
+            self.revalidate(self.guest_client, url, response).status_code,
+            304)
+
+    def test_viewer_and_page_change_etag(self):
+        '''Гость и вошедший пользователь, разные страницы — разные ETag'''
+        url = self.urls['index']
+        guest = self.guest_client.get(url)
+        self.assertEqual(
+            self.revalidate(self.reader_client, url, guest).status_code, 200)
+        self.assertEqual(self.guest_client.get(
+            url, {'page': 2}, HTTP_IF_NONE_MATCH=guest['ETag']).status_code,
+            200)
+
+    def test_changes_invalidate_pages(self):
+        '''Новый пост, комментарий и подписка меняют версии страниц'''
+        changes = {
+            'post': (lambda: Post.objects.create(
+                author=self.author, group=self.group, text='Ещё'),
+                # на странице поста — число постов автора
+                ('index', 'group', 'profile', 'detail')),
+            'comment': (lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='Комментарий'),
+                ('index', 'group', 'profile', 'detail')),
+            'follow': (lambda: Follow.objects.create(
+                user=self.reader, author=self.author),
+                ('profile', 'detail')),
+        }
+        for change, (make, pages) in changes.items():
+            responses = {name: self.guest_client.get(url)
+                         for name, url in self.urls.items()}
+            make()
+            for name, url in self.urls.items():
+                with self.subTest(change=change, page=name):
+                    status = self.revalidate(self.guest_client, url,
+                                             responses[name]).status_code
+                    self.assertEqual(status, 200 if name in pages else 304)
+
+    def test_validators_come_from_the_page_replica(self):
+        '''Версии для ETag и кэша страницы читаются с той же реплики,
+        что и посты: отстающая страница не получит новый ETag'''
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                cache.clear()
+                with replica_on_default() as seen:
+                    self.guest_client.get(url)
+                models = {model for model, _ in seen}
+                self.assertIn(PageVersion, models)
+                self.assertIn(Post, models)
+                self.assertEqual({alias for _, alias in seen}, {'replica'})
+
+    def test_missing_post_is_404(self):
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6}))
+        self.assertEqual(response.status_code, 404)
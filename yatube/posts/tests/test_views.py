@@ -66,7 +66,8 @@ class PaginatorViewsTest(TestCase):
                     error_name)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+# тесты смотрят контекст шаблона, поэтому view выполняется всегда
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PAGE_CACHE_TIMEOUT=0)
 class ViewsTest(TestCase):
 
     def setUp(self):
@@ -250,6 +251,7 @@ class ViewsTest(TestCase):
             response = self.guest_client.get(path)
             self.check_context_contains_page_or_post(response.context, True)
 
+    @override_settings(PAGE_CACHE_TIMEOUT=300)
     def test_cache_context(self):
         '''Проверка кэширования страницы index'''
         # Создаем пост
@@ -262,23 +264,21 @@ class ViewsTest(TestCase):
             reverse('posts:index'))
         # получаем контекст_1
         context_1 = response_1.content
-        # удаляем существующий пост
-        post2.delete()
-        # Post.objects.get(pk=self.post.id).delete()
-        # делаем запрос 2
+        # делаем запрос 2: страница не менялась и берётся из кэша
         response_2 = self.authorized_client.get(
             reverse('posts:index'))
-        # получаем контекст_2
-        context_2 = response_2.content
-        # сравниваем контекст_1 == контекст_2
-        self.assertEqual(context_1, context_2)
-        # Очистка
-        cache.clear()
-        # Третий шаг
+        self.assertEqual(response_2.content, context_1)
+        self.assertFalse(response_2.templates)
+        # удаляем пост: у ленты новая версия, кэш её не подменяет
+        post2.delete()
         response_3 = self.authorized_client.get(reverse('posts:index'))
         context_3 = response_3.content
-        # Проверка очистки кэша
-        self.assertNotEqual(context_3, context_2)
+        self.assertNotEqual(context_3, context_1)
+        self.assertNotContains(response_3, 'Текст поста для кэша')
+        # Очистка кэша страницу не меняет
+        cache.clear()
+        response_4 = self.authorized_client.get(reverse('posts:index'))
+        self.assertEqual(response_4.content, context_3)
 
 
 class CommentTest(TestCase):
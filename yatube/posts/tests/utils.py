@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.db import PrimaryReplicaRouter
+
+
+@contextmanager
+def replica_on_default():
+    """Реплика 'replica' для тестов: роутер выбирает её, а запросы
+    идут в default. Отдаёт список пар (модель, выбор роутера)."""
+    seen = []
+    choose = PrimaryReplicaRouter.db_for_read
+
+    def db_for_read(router, model, **hints):
+        seen.append((model, choose(router, model, **hints)))
+        return 'default'
+
+    with override_settings(DATABASE_REPLICAS=['replica']), \
+            mock.patch.object(PrimaryReplicaRouter, 'db_for_read',
+                              db_for_read):
+        yield seen
+
+
+class QueryBudgetMixin:
+    """Проверка «бюджета» запросов страницы для TestCase.
+
+    Число запросов не должно зависеть от размера страницы,
+    иначе в шаблоне или во view есть N+1.
+    """
+    page_sizes = (1, 5, 10)
+
+    def count_queries(self, client, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, params)
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries)
+
+    def assertQueryBudget(self, client, url, budget, params=None,
+                          page_sizes=None):
+        """Страница url укладывается ровно в budget запросов
+        при любом POSTS_PER_PAGE из page_sizes."""
+        for size in page_sizes or self.page_sizes:
+            with self.subTest(url=url, page_size=size):
+                with override_settings(POSTS_PER_PAGE=size):
+                    used = self.count_queries(client, url, params)
+                self.assertEqual(
+                    used, budget,
+                    f'{url}: {used} запросов при странице из {size} '
+                    f'постов, бюджет {budget}')
@@ -0,0 +1,208 @@
+"""Копии картинок постов для адаптивной разметки <picture>.
+
+После сохранения поста картинка декодируется и проверяется фоновой
+задачей (core.tasks, выполняет manage.py run_worker). Из неё вырезается кадр
+с пропорциями POST_IMAGE_RATIO, и этот кадр сохраняется в каждой
+ширине POST_IMAGE_WIDTHS и в каждом формате POST_IMAGE_FORMATS
+(ImageVariant). Шаблон только читает готовые варианты. Страница со
+списком постов берёт их для всех постов одним запросом
+(ThumbnailBatch).
+"""
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+from PIL import Image, ImageOps
+
+from core.tasks import task
+
+from . import versions
+from .models import ImageVariant, Post
+
+try:
+    # AVIF в Pillow появился в 11.3, для старых версий нужен плагин
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+logger = logging.getLogger(__name__)
+
+# формат Pillow -> (расширение, MIME-тип, параметры сохранения)
+FORMATS = {
+    'AVIF': ('avif', 'image/avif', {'quality': 50}),
+    'WEBP': ('webp', 'image/webp', {'quality': 75, 'method': 6}),
+    'JPEG': ('jpg', 'image/jpeg', {'quality': 82, 'optimize': True,
+                                   'progressive': True}),
+}
+# битые и слишком большие файлы
+BROKEN_IMAGE_ERRORS = (OSError, SyntaxError, ValueError,
+                       Image.DecompressionBombError)
+
+
+def formats():
+    """Форматы из POST_IMAGE_FORMATS, которые умеет сохранять Pillow."""
+    Image.init()
+    return [name for name in settings.POST_IMAGE_FORMATS
+            if name in Image.SAVE]
+
+
+def sizes(source_width):
+    """Размеры кадров: ширины не больше исходной, но хотя бы одна."""
+    ratio_width, ratio_height = settings.POST_IMAGE_RATIO
+    widths = [width for width in settings.POST_IMAGE_WIDTHS
+              if width <= source_width] or settings.POST_IMAGE_WIDTHS[:1]
+    return [(width, round(width * ratio_height / ratio_width))
+            for width in widths]
+
+
+def _decode(field):
+    # verify() проверяет файл целиком, но после него картинку
+    # нужно открыть заново, чтобы декодировать
+    field.open('rb')
+    try:
+        Image.open(field).verify()
+        field.seek(0)
+        image = Image.open(field)
+        image.load()
+    finally:
+        field.close()
+    return ImageOps.exif_transpose(image).convert('RGB')
+
+
+def _encode(image, name):
+    buffer = BytesIO()
+    image.save(buffer, name, **FORMATS[name][2])
+    return ContentFile(buffer.getvalue())
+
+
+def _variant_name(source, width, name):
+    # хеш имени исходника в имени копии: после замены картинки
+    # браузер не возьмёт старую копию из своего кэша
+    stem = os.path.splitext(os.path.basename(source))[0]
+    digest = hashlib.md5(source.encode()).hexdigest()[:8]
+    return (f'posts/variants/{stem}-{digest}-{width}.'
+            f'{FORMATS[name][0]}')
+
+
+def _reject(post):
+    # файл не удаляем: его можно достать из хранилища и разобраться
+    logger.error('Картинка поста %s не читается (%s), она убрана из поста',
+                 post.pk, post.image.name)
+    Post.objects.filter(pk=post.pk, image=post.image.name).update(image='')
+    versions.touch_post(post, post.group_id)
+
+
+@task(max_attempts=3)
+def generate(post_id):
+    """Создаёт все варианты картинки поста (выполняется воркером)."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id').first()
+    if post is None or not post.image:
+        return
+    source = post.image.name
+    try:
+        image = _decode(post.image)
+    except BROKEN_IMAGE_ERRORS:
+        _reject(post)
+        return
+    variants = []
+    for width, height in sizes(image.width):
+        frame = ImageOps.fit(image, (width, height), Image.LANCZOS)
+        for name in formats():
+            variants.append(ImageVariant(
+                post_id=post_id, source=source, format=name,
+                width=width, height=height,
+                file=default_storage.save(
+                    _variant_name(source, width, name),
+                    _encode(frame, name))))
+    with transaction.atomic():
+        old = ImageVariant.objects.select_for_update().filter(
+            post_id=post_id)
+        stale = list(old)
+        old.delete()
+        current = Post.objects.filter(pk=post_id, image=source).exists()
+        if current:
+            ImageVariant.objects.bulk_create(variants)
+    # картинку успели заменить — новые копии тоже не нужны
+    for variant in stale + ([] if current else variants):
+        default_storage.delete(variant.file.name)
+    if current:
+        versions.touch_post(post, post.group_id)
+
+
+class Picture:
+    """Готовые варианты картинки поста для разметки <picture>.
+
+    sources — по одному <source> на формат, кроме последнего;
+    последний (запасной) формат идёт в <img> вместе с src и размерами.
+    Если ни одна копия не в POST_IMAGE_FORMATS (настройки сменились
+    после их создания), img — None и шаблон показывает исходный файл.
+    files — имена файлов всех копий для ключа кэша карточки.
+    """
+
+    def __init__(self, variants):
+        self.files = tuple(sorted(variant.file.name for variant in variants))
+        by_format = defaultdict(list)
+        for variant in variants:
+            by_format[variant.format].append(variant)
+        names = [name for name in settings.POST_IMAGE_FORMATS
+                 if name in by_format]
+        self.sizes = settings.POST_IMAGE_SIZES
+        if not names:
+            self.sources, self.srcset, self.img = [], '', None
+            return
+        self.sources = [{'type': FORMATS[name][1],
+                         'srcset': self._srcset(by_format[name])}
+                        for name in names[:-1]]
+        fallback = by_format[names[-1]]
+        self.srcset = self._srcset(fallback)
+        # src для браузеров без srcset: ширина старой карточки
+        card = settings.POST_IMAGE_RATIO[0]
+        self.img = ([v for v in fallback if v.width <= card]
+                    or fallback)[-1]
+
+    @staticmethod
+    def _srcset(variants):
+        return ', '.join(f'{v.file.url} {v.width}w' for v in variants)
+
+
+def pictures_for(post_ids):
+    """Готовые картинки постов одним запросом: {id поста: Picture}."""
+    if not post_ids:
+        return {}
+    variants = defaultdict(list)
+    for variant in ImageVariant.objects.filter(
+            post_id__in=post_ids, source=F('post__image')):
+        variants[variant.post_id].append(variant)
+    return {post_id: Picture(items) for post_id, items in variants.items()}
+
+
+class ThumbnailBatch:
+    """Картинки всех постов страницы, найденные одним запросом.
+
+    Запрос выполняется при первом обращении, так что страница,
+    отданная из кэша фрагментов, не делает ни одного запроса.
+    """
+
+    def __init__(self, posts):
+        self.posts = posts
+        self._pictures = None
+
+    def get(self, post):
+        if self._pictures is None:
+            self._pictures = pictures_for(
+                [item.pk for item in self.posts if item.image])
+        return self._pictures.get(post.pk)
+
+
+def schedule(post):
+    """Ставит создание копий в очередь фоновых задач."""
+    if post.image:
+        generate.delay(post.pk)
@@ -0,0 +1,101 @@
+"""Перенос пользователей, групп, постов, комментариев и подписок JSONL.
+
+Строка файла — одна запись: {"model": "posts.post", "fields": {...}},
+поля — колонки модели (attname), включая id. Модели идут в порядке
+зависимостей, поэтому при загрузке пачку можно сохранять, как только
+в файле началась следующая модель.
+"""
+import json
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from . import feed, search, versions
+from .models import Comment, Follow, Group, Post, User
+from .utils import count_key, invalidate_counts
+
+MODELS = (User, Group, Post, Comment, Follow)
+
+
+def columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _default(value):
+    # isoformat, а не DjangoJSONEncoder: тот обрезает микросекунды
+    return value.isoformat()
+
+
+def export_lines(chunk_size):
+    """Строки JSONL всех моделей; каждая читается итератором."""
+    for model in MODELS:
+        label = model._meta.label_lower
+        names = columns(model)
+        rows = model._default_manager.order_by('pk').values_list(*names)
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield label, json.dumps(
+                {'model': label, 'fields': dict(zip(names, row))},
+                ensure_ascii=False, default=_default) + '\n'
+
+
+@contextmanager
+def given_dates():
+    """Даты auto_now/auto_now_add сохраняются как заданы, а не текущие."""
+    fields = [field for model in MODELS
+              for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False)
+              or getattr(field, 'auto_now_add', False)]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def parse_line(line):
+    """Модель и несохранённый объект из строки JSONL."""
+    record = json.loads(line)
+    model = apps.get_model(record['model'])
+    if model not in MODELS:
+        raise ValueError(f'Модель {record["model"]} не переносится')
+    return model, model(**record['fields'])
+
+
+def rebuild_derived(stdout=None):
+    """Денормализованные данные — один раз после массовой загрузки."""
+    statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+    with transaction.atomic():
+        feed.rebuild()
+    call_command('recount', stdout=stdout)
+    # заодно возвращает триггеры индекса, снятые на время загрузки
+    search.rebuild()
+    versions.touch_all()
+    forget_counts()
+
+
+def forget_counts(chunk_size=1000):
+    """Сбрасывает закэшированные числа постов всех лент.
+
+    Остальной кэш общий с другими приложениями и не трогается:
+    страницы и карточки постов после touch_all и так под новыми
+    ключами.
+    """
+    invalidate_counts(count_key('all'))
+    for model, scopes in ((Group, ('group',)), (User, ('author', 'feed'))):
+        pks = model.objects.order_by('pk').values_list('pk', flat=True)
+        keys = []
+        for pk in pks.iterator(chunk_size=chunk_size):
+            keys.extend(count_key(scope, pk) for scope in scopes)
+            if len(keys) >= chunk_size:
+                invalidate_counts(*keys)
+                keys = []
+        invalidate_counts(*keys)
@@ -12,8 +12,13 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     # Просмотр записи
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    # Поиск по постам и комментариям
+    path('search/', views.search, name='search'),
     # Создание новой записи
     path('create/', views.post_create, name='post_create'),
+    # следующие страницы комментариев (HTML-фрагмент)
+    path('posts/<int:post_id>/comments/',
+         views.comment_list, name='comment_list'),
     # форма добавления комментариев
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
@@ -1,9 +1,217 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
 from django.conf import settings
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from core.db import reading_replica
+
+from .models import Comment
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа в непрозрачный токен для URL."""
+    raw = json.dumps([str(value) for value in values]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, fields):
+    """Распаковывает токен обратно в значения полей ключа.
+
+    Возвращает None, если токен повреждён или не подходит к ключу.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(fields):
+            return None
+        return [field.to_python(value)
+                for field, value in zip(fields, values)]
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def seek(keys, values, forward=True):
+    """Условие «строго после» (или «строго до») ключа values
+    при сортировке по keys по убыванию."""
+    lookup = 'lt' if forward else 'gt'
+    condition = Q()
+    for position, key in enumerate(keys):
+        step = Q(**{f'{key}__{lookup}': values[position]})
+        for previous, value in zip(keys[:position], values):
+            step &= Q(**{previous: value})
+        condition |= step
+    return condition
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT(*) и OFFSET.
+
+    Каждая страница — один запрос по индексу: берём на одну запись
+    больше, чем нужно, чтобы узнать, есть ли следующая страница.
+    Номера страниц относительные (1 — первая, 2 — любая следующая),
+    этого хватает стандартному Page для has_next/has_previous.
+    """
+    cursor = True
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'id')):
+        self.keys = keys
+        ordering = [f'-{key}' for key in keys]
+        super().__init__(object_list.order_by(*ordering), per_page)
+        opts = object_list.model._meta
+        self.key_fields = [opts.get_field(key) for key in keys]
+        self.number = 1
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    @property
+    def num_pages(self):
+        return self.number + 1 if self.next_cursor else self.number
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def validate_number(self, number):
+        return number
+
+    def cursor_for(self, obj):
+        return encode_cursor(getattr(obj, key) for key in self.keys)
+
+    def _seek(self, values, forward):
+        return seek(self.keys, values, forward)
+
+    def _fetch(self, values, forward):
+        # на одну запись больше страницы, в порядке обхода от токена
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+            if not forward:
+                queryset = queryset.reverse()
+        return list(queryset[:self.per_page + 1])
+
+    def _objects(self, rows):
+        return rows
+
+    def get_page(self, after=None, before=None):
+        """Возвращает страницу после токена after или до токена before.
+
+        Неверный токен, как и в Paginator.get_page, даёт первую страницу.
+        """
+        forward = before is None
+        values = decode_cursor(after or before or '', self.key_fields)
+        rows = self._fetch(values, forward)
+        extra = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward and values is not None:
+            if not rows:
+                # левее токена ничего нет — это и есть первая страница
+                return self.get_page()
+            rows.reverse()
+            # назад есть куда листать, только если нашлась лишняя запись
+            has_previous, has_next = extra, True
+        else:
+            has_previous, has_next = values is not None, extra
+        self.number = 2 if has_previous else 1
+        if rows and has_next:
+            self.next_cursor = self.cursor_for(rows[-1])
+        if rows and has_previous:
+            self.previous_cursor = self.cursor_for(rows[0])
+        page = Page(self._objects(rows), self.number, self)
+        page.next_cursor = self.next_cursor
+        page.previous_cursor = self.previous_cursor
+        return page
+
+
+def comments_page(post_id, after=None):
+    """Страница комментариев поста от новых к старым по курсору after.
+
+    Всего комментариев — в Post.comments_count, COUNT(*) не нужен.
+    """
+    comments = Comment.objects.filter(post_id=post_id).select_related(
+        'author')
+    paginator = CursorPaginator(comments, settings.COMMENTS_PER_PAGE)
+    return paginator.get_page(after=after)
+
+
+def count_key(scope, pk=None):
+    """Ключ кэша с числом постов ленты: all, group, author или feed."""
+    if pk is None:
+        return f'posts:count:{scope}'
+    return f'posts:count:{scope}:{pk}'
+
+
+def invalidate_counts(*keys):
+    cache.delete_many(keys)
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator со смещением, который берёт count из кэша.
+
+    Число записей хранится под count_key и сбрасывается сигналами
+    при изменении ленты, поэтому COUNT(*) выполняется только после
+    сброса, а не на каждый запрос. Число с реплики не сохраняется:
+    отстающее, оно осталось бы в кэше до следующей записи.
+    """
+    ELLIPSIS = '…'
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        total = cache.get(self.count_key)
+        if total is None:
+            total = super().count
+            if not reading_replica():
+                cache.set(self.count_key, total,
+                          settings.PAGINATOR_COUNT_TIMEOUT)
+        return total
+
+    def get_elided_page_range(self, number=1, on_each_side=3, on_ends=1):
+        """Номера страниц вокруг текущей, края и ELLIPSIS между ними."""
+        number = self.validate_number(number)
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            yield from self.page_range
+            return
+        if number > 1 + on_each_side + on_ends + 1:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, number + 1)
+        else:
+            yield from range(1, number + 1)
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            yield from range(number + 1, number + on_each_side + 1)
+            yield self.ELLIPSIS
+            yield from range(self.num_pages - on_ends + 1,
+                             self.num_pages + 1)
+        else:
+            yield from range(number + 1, self.num_pages + 1)
 
 
 # метод Paginator
-def paginate(request, posts):
-    paginator = Paginator(posts, settings.POSTS_PER_PAGE)
+def paginate(request, posts, keys=('pub_date', 'id'), count_key=None):
+    """Страница постов: по курсору ?after=/?before=, а для старых
+    ссылок ?page=N — Paginator со смещением и кэшированным count."""
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if page_number is not None:
+        paginator = CachedCountPaginator(posts, settings.POSTS_PER_PAGE,
+                                         count_key=count_key)
+        page = paginator.get_page(page_number)
+        # окно номеров считаем здесь, а не циклом в шаблоне
+        page.elided_range = list(paginator.get_elided_page_range(
+            page.number,
+            on_each_side=settings.PAGINATOR_ON_EACH_SIDE,
+            on_ends=settings.PAGINATOR_ON_ENDS))
+        return page
+    paginator = CursorPaginator(posts, settings.POSTS_PER_PAGE, keys=keys)
+    return paginator.get_page(after=request.GET.get('after'),
+                              before=request.GET.get('before'))
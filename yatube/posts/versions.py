@@ -0,0 +1,155 @@
+"""Версии содержимого страниц для условных GET-запросов.
+
+Версия — счётчик изменений и время последнего из них в таблице
+PageVersion под ключом области (вся лента, группа, автор, пост;
+site — то, что видно везде). Сигналы меняют версии при записи в той
+же транзакции, а view по ним до рендеринга считает ETag
+и Last-Modified и отвечает 304, если у клиента та же страница.
+Версии лежат в БД, а не в кэше процесса, поэтому запись, принятая
+одним воркером, меняет ETag во всех. Тот же ETag — ключ готовой
+страницы в общем кэше: при попадании view не выполняется вовсе.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from core.cache import get_or_rebuild
+
+from .models import Group, PageVersion, User
+
+
+def version_key(scope, key=None):
+    """Ключ версии: site, all, group (slug), author (username), post (id)."""
+    if key is None:
+        return f'posts:version:{scope}'
+    return f'posts:version:{scope}:{key}'
+
+
+def touch(*keys):
+    """Отмечает изменение содержимого под ключами keys."""
+    now = timezone.now()
+    PageVersion.objects.bulk_create(
+        [PageVersion(key=key, changed=now) for key in keys],
+        ignore_conflicts=True)
+    PageVersion.objects.filter(key__in=keys).update(
+        version=F('version') + 1, changed=now)
+
+
+def touch_all():
+    """Меняет версии всех страниц, например после импорта данных."""
+    touch(version_key('site'))
+    PageVersion.objects.update(version=F('version') + 1,
+                               changed=timezone.now())
+
+
+def post_keys(post, *group_ids):
+    """Ключи версий всех страниц, на которых виден пост."""
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    username = User.objects.filter(pk=post.author_id).values_list(
+        'username', flat=True).first()
+    return [version_key('all'), version_key('post', post.pk),
+            version_key('author', username),
+            *(version_key('group', slug) for slug in slugs)]
+
+
+def touch_post(post, *group_ids):
+    touch(*post_keys(post, *group_ids))
+
+
+def page_validators(request, keys):
+    """ETag и Last-Modified страницы с версиями keys для этого зрителя.
+
+    В ETag входят пользователь (шаблоны для гостя и для вошедшего
+    разные) и полный путь с параметрами страницы. Last-Modified
+    точен до секунды: если последнее изменение было в текущую
+    секунду, следующее может попасть в неё же и клиент с
+    If-Modified-Since получил бы 304 для старой страницы, поэтому
+    тогда отдаётся только ETag.
+    """
+    keys = [version_key('site'), *keys]
+    rows = {key: (version, changed) for key, version, changed in
+            PageVersion.objects.filter(key__in=keys).values_list(
+                'key', 'version', 'changed')}
+    viewer = request.user.pk if request.user.is_authenticated else 'guest'
+    raw = '|'.join([str(viewer), request.get_full_path(),
+                    *(str(rows.get(key, (0,))[0]) for key in keys)])
+    etag = hashlib.md5(raw.encode()).hexdigest()
+    last_modified = None
+    if rows:
+        latest = max(changed for _, changed in rows.values())
+        if int(latest.timestamp()) < int(time.time()):
+            last_modified = latest
+    return etag, last_modified
+
+
+class _Uncacheable(Exception):
+    """Ответ view, который нельзя класть в кэш страниц."""
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def _cached(view):
+    """Готовая страница из кэша под ключом ETag (PAGE_CACHE_TIMEOUT).
+
+    В кэш попадают только обычные ответы 200 без cookie; остальные
+    отдаются как есть. PAGE_CACHE_TIMEOUT = 0 выключает кэш.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        etag = getattr(request, '_page_validators', (None, None))[0]
+        if (etag is None or request.method != 'GET'
+                or not settings.PAGE_CACHE_TIMEOUT):
+            return view(request, *args, **kwargs)
+
+        def build():
+            response = view(request, *args, **kwargs)
+            if (response.status_code != 200 or response.streaming
+                    or response.cookies):
+                raise _Uncacheable(response)
+            return response.content, response['Content-Type']
+
+        key = f'posts:page:{settings.POSTS_TEMPLATE_ENGINE}:{etag}'
+        try:
+            content, content_type = get_or_rebuild(
+                key, build, settings.PAGE_CACHE_TIMEOUT)
+        except _Uncacheable as error:
+            return error.response
+        return HttpResponse(content, content_type=content_type)
+    return wrapper
+
+
+def conditional_page(scopes, cache=False):
+    """Декоратор view: 304 без рендеринга, если страница не менялась.
+
+    scopes(request, *args, **kwargs) возвращает ключи версий страницы
+    или None, если объекта нет (тогда view сама ответит 404).
+    cache=True — ещё и кэш готовой страницы: только для страниц без
+    форм с CSRF-токеном.
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_page_validators'):
+            keys = scopes(request, *args, **kwargs)
+            request._page_validators = (
+                (None, None) if keys is None
+                else page_validators(request, keys))
+        return request._page_validators
+
+    def decorator(view):
+        if cache:
+            view = _cached(view)
+        return condition(
+            etag_func=lambda request, *args, **kwargs:
+                validators(request, *args, **kwargs)[0],
+            last_modified_func=lambda request, *args, **kwargs:
+                validators(request, *args, **kwargs)[1])(view)
+    return decorator
@@ -1,53 +1,102 @@
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.utils.http import urlencode
+from core.db import replica_reads
 from .models import Post, Group, User, Follow
 from .forms import PostForm, CommentForm
-from .utils import paginate
+from .utils import comments_page, count_key, paginate
+from .feed import feed_for
+from .counters import stats_for
+from .search import search_page
+from .versions import conditional_page, version_key
+from . import fragments, thumbnails
 
 
+@replica_reads
+@conditional_page(lambda request: [version_key('all')], cache=True)
 def index(request):
-    posts = Post.objects.all()
-    page_obj = paginate(request, posts)
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = paginate(request, posts, count_key=count_key('all'))
+    pictures = thumbnails.ThumbnailBatch(page_obj)
     context = {
         'page_obj': page_obj,
+        'thumbnail_batch': pictures,
+        'fragment_batch': fragments.FragmentBatch(page_obj, pictures),
     }
-    return render(request, 'posts/index.html', context)
+    return render(request, 'posts/index.html', context,
+                  using=settings.POSTS_TEMPLATE_ENGINE)
 
 
+@replica_reads
+@conditional_page(lambda request, slug: [version_key('group', slug)],
+                  cache=True)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    page_obj = paginate(request, posts)
+    posts = group.posts.select_related('author')
+    page_obj = paginate(request, posts,
+                        count_key=count_key('group', group.pk))
+    pictures = thumbnails.ThumbnailBatch(page_obj)
     context = {'group': group,
                'posts': posts,
-               'page_obj': page_obj}
-    return render(request, 'posts/group_list.html', context)
+               'page_obj': page_obj,
+               'thumbnail_batch': pictures,
+               'fragment_batch': fragments.FragmentBatch(page_obj, pictures)}
+    return render(request, 'posts/group_list.html', context,
+                  using=settings.POSTS_TEMPLATE_ENGINE)
 
 
+@replica_reads
+@conditional_page(
+    lambda request, username: [version_key('author', username)],
+    cache=True)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    post_count = posts.count()
-    page_obj = paginate(request, posts)
+    author = get_object_or_404(User.objects.select_related('stats'),
+                               username=username)
+    # автор уже известен менеджеру, догружаем только группы
+    posts = author.posts.select_related('group')
+    # счётчики хранятся в UserStats, COUNT(*) не нужен
+    stats = stats_for(author)
+    page_obj = paginate(request, posts,
+                        count_key=count_key('author', author.pk))
     following = (request.user.is_authenticated and Follow.objects.filter(
         user=request.user,
         author=author).exists())
+    pictures = thumbnails.ThumbnailBatch(page_obj)
     context = {
         'author': author,
         'page_obj': page_obj,
-        'post_count': post_count,
+        'post_count': stats.posts_count,
+        'stats': stats,
         'posts': posts,
-        'following': following}
+        'following': following,
+        'thumbnail_batch': pictures,
+        'fragment_batch': fragments.FragmentBatch(page_obj, pictures)}
+
+    return render(request, 'posts/profile.html', context,
+                  using=settings.POSTS_TEMPLATE_ENGINE)
+
 
-    return render(request, 'posts/profile.html', context)
+def post_detail_versions(request, post_id):
+    # на странице поста есть и число постов автора
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True).first()
+    if username is None:
+        return None
+    return [version_key('post', post_id), version_key('author', username)]
 
 
+@replica_reads
+@conditional_page(post_detail_versions)
 def post_detail(request, post_id):
     # Здесь код запроса к модели и создание словаря контекста
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id)
+    # первая страница комментариев, остальные — через comment_list
+    comments = comments_page(post.pk)
     form = CommentForm()
-    post_count = post.author.posts.count()
+    post_count = stats_for(post.author).posts_count
     context = {
         'post': post,
         'post_count': post_count,
@@ -56,7 +105,36 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_list_versions(request, post_id):
+    if not Post.objects.filter(pk=post_id).exists():
+        return None
+    return [version_key('post', post_id)]
+
+
+@replica_reads
+@conditional_page(comment_list_versions)
+def comment_list(request, post_id):
+    # HTML следующей страницы комментариев для подгрузки в post_detail
+    get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments = comments_page(post_id, after=request.GET.get('after'))
+    context = {'comments': comments, 'post_id': post_id}
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def search(request):
+    # полнотекстовый поиск по постам и комментариям (FTS5)
+    query = request.GET.get('q', '').strip()
+    page_obj = search_page(request)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@transaction.atomic
 def post_create(request):
     form = PostForm(
         request.POST or None,
@@ -72,10 +150,13 @@ def post_create(request):
     post = form.save(commit=False)
     post.author = request.user
     post.save()
+    # миниатюры создаются в фоне, а не при первом показе страницы
+    thumbnails.schedule(post)
     return redirect('posts:profile', request.user.username)
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = PostForm(
@@ -89,10 +170,13 @@ def post_edit(request, post_id):
             {'form': form, 'post': post})
 
     post = form.save()
+    if 'image' in form.changed_data:
+        thumbnails.schedule(post)
     return redirect('posts:post_detail', post_id)
 
 
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     # Получите пост и сохраните его в переменную post.
@@ -105,17 +189,26 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@replica_reads
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
     # информация о текущем пользователе доступна в переменной request.user
-    posts = Post.objects.filter(author__following__user=request.user)
-    page = paginate(request, posts)
-    context = {"page_obj": page}
-    return render(request, template, context)
+    # лента заранее разложена по FeedItem: читаем один диапазон индекса
+    page = paginate(request, feed_for(request.user),
+                    keys=('pub_date', 'post_id'),
+                    count_key=count_key('feed', request.user.pk))
+    page.object_list = [item.post for item in page.object_list]
+    pictures = thumbnails.ThumbnailBatch(page)
+    context = {"page_obj": page,
+               'thumbnail_batch': pictures,
+               'fragment_batch': fragments.FragmentBatch(page, pictures)}
+    return render(request, template, context,
+                  using=settings.POSTS_TEMPLATE_ENGINE)
 
 
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
     # Подписаться на автора
     author = get_object_or_404(User, username=username)
@@ -126,6 +219,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
     # Дизлайк, отписка
     user = request.user
@@ -0,0 +1,50 @@
+"""Окружение Jinja2 для шаблонов лент (каталог templates/jinja2/).
+
+Включается настройкой POSTS_TEMPLATE_ENGINE = 'jinja2', если пакет
+Jinja2 установлен. Здесь — аналоги тегов и фильтров шаблонов Django,
+которыми пользуются эти страницы: url, static, date, linebreaks,
+addclass, post_picture и блок кэша post_fragment (вызывается через
+{% call %}).
+"""
+from django.template.defaultfilters import date, linebreaks_filter
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+from jinja2 import Environment
+
+from core.templatetags.user_filters import addclass
+from posts import fragments
+from posts.templatetags.post_images import post_picture
+
+try:
+    from jinja2 import pass_context
+except ImportError:
+    # Jinja2 < 3.0
+    from jinja2 import contextfunction as pass_context
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args, kwargs=kwargs)
+
+
+@pass_context
+def post_fragment(context, post, caller):
+    """{% call post_fragment(post) %} — как {% postfragment %}."""
+    return mark_safe(fragments.cached_card(context, post,
+                                           lambda: str(caller())))
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'post_fragment': post_fragment,
+        'post_picture': pass_context(post_picture),
+    })
+    env.filters.update({
+        'date': date,
+        'linebreaks': linebreaks_filter,
+        'addclass': addclass,
+    })
+    return env
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
+import importlib.util
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
@@ -46,11 +47,16 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',  # Добавленная запись
+    'api.apps.ApiConfig',  # JSON API только для чтения
     'sorl.thumbnail',  # для работы с картинками
     'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    # первым: Server-Timing учитывает время всех остальных
+    'core.middleware.ServerTimingMiddleware',
+    # до сессий: их сохранение — тоже запись
+    'core.middleware.StickyPrimaryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -88,6 +94,24 @@ TEMPLATES = [
     },
 ]
 
+# Шаблоны лент на Jinja2 (templates/jinja2/): движок подключается,
+# только если пакет Jinja2 установлен, а используется, когда
+# POSTS_TEMPLATE_ENGINE = 'jinja2' (сравнение: manage.py bench_templates)
+if importlib.util.find_spec('jinja2') is not None:
+    TEMPLATES.append({
+        'NAME': 'jinja2',
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(TEMPLATES_DIR, 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'yatube.jinja2.environment',
+            'context_processors': TEMPLATES[0]['OPTIONS'][
+                'context_processors'],
+        },
+    })
+# None — шаблоны Django
+POSTS_TEMPLATE_ENGINE = None
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -96,11 +120,44 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # sqlite3 с transaction_mode (core.backends.sqlite3)
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # соединение живёт между запросами вместе с кэшем страниц
+        'CONN_MAX_AGE': 60,
+        # atomic() сразу берёт блокировку на запись: писатели ждут
+        # друг друга (busy_timeout), а не получают «database is locked»
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
     }
 }
 
+# Прагмы каждого нового соединения SQLite (core.sqlite): WAL, ожидание
+# блокировки вместо ошибки (мс), кэш страниц (отрицательное — в КиБ),
+# mmap (байт); auto_vacuum включится после sqlite_maintenance --vacuum
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'auto_vacuum': 'INCREMENTAL',
+}
+
+# Реплики только для чтения (core.db): алиасы из DATABASES, с которых
+# читают ленты и страница поста; пусто — всё читается из default.
+# После записи посетитель REPLICA_STICKY_SECONDS секунд читает
+# из default. Локально реплика — копия файла (manage.py sync_replicas):
+# DATABASES['replica'] = {
+#     'ENGINE': 'django.db.backends.sqlite3',
+#     'NAME': os.path.join(BASE_DIR, 'replica.sqlite3'),
+#     'TEST': {'MIRROR': 'default'},
+# }
+# DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+REPLICA_STICKY_SECONDS: int = 5
+DATABASE_ROUTERS = ['core.db.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -147,12 +204,31 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
+# письма сначала попадают в очередь исходящих (core.mail),
+# а отправляет их воркер через OUTBOX_EMAIL_BACKEND
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
 #  подключаем движок filebased.EmailBackend
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Очередь исходящих: писем на одно соединение, писем в секунду
+# на одну задачу deliver (0 — без ограничения; потоки воркера
+# умножают предел) и попыток до состояния failed
+OUTBOX_BATCH_SIZE: int = 100
+OUTBOX_RATE: float = 10
+OUTBOX_MAX_ATTEMPTS: int = 5
 
 POSTS_PER_PAGE: int = 10
+# Комментариев на странице поста и в каждой подгрузке
+COMMENTS_PER_PAGE: int = 20
+# Размер страницы JSON API по умолчанию и наибольший (?limit=)
+API_PAGE_SIZE: int = 20
+API_MAX_PAGE_SIZE: int = 100
+# Пагинация со смещением: окно номеров вокруг текущей страницы
+# и время жизни закэшированного числа постов (сбрасывается сигналами)
+PAGINATOR_ON_EACH_SIDE: int = 3
+PAGINATOR_ON_ENDS: int = 1
+PAGINATOR_COUNT_TIMEOUT: int = 60 * 60
 LEN_OF_POSTS: int = 15
 TEST_OF_POST: int = 13
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -160,8 +236,60 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Копии картинок постов (posts.thumbnails): кадр с пропорциями
+# POST_IMAGE_RATIO нескольких ширин для srcset, в форматах от лучшего
+# к запасному; форматы, которых не умеет Pillow, пропускаются
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_WIDTHS = (320, 640, 960, 1440)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+# Ширина картинки в вёрстке для атрибута sizes
+POST_IMAGE_SIZES = '(min-width: 1200px) 1110px, 100vw'
+# Сколько хранить HTML карточки поста в списках (posts.fragments)
+POST_FRAGMENT_TIMEOUT: int = 60 * 60 * 24
+
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+# Для нескольких WSGI-воркеров на одном хосте — общий кэш в файле
+# SQLite без отдельного сервера (сравнение: manage.py bench_cache):
+# CACHES['default'] = {
+#     'BACKEND': 'core.cache_backends.SQLiteCache',
+#     'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+#     'OPTIONS': {'MAX_SIZE': 64 * 1024 * 1024},
+# }
+
+# Кэш страниц лент (core.cache): коэффициент раннего пересчёта,
+# сколько отдавать устаревшую копию, сколько держать блокировку
+# и сколько без копии ждать чужого пересчёта
+FEED_CACHE_BETA: float = 1.0
+FEED_CACHE_GRACE: int = 60
+FEED_CACHE_LOCK_TIMEOUT: int = 10
+FEED_CACHE_WAIT: float = 2
+# Сколько хранить готовую страницу ленты (posts.versions.conditional_page);
+# ключ содержит ETag, поэтому изменения видны сразу
+PAGE_CACHE_TIMEOUT: int = 60 * 5
+
+# Лента подписок: сколько последних постов автора попадает в ленту
+# при подписке и каким пакетом пишем записи ленты
+FEED_BACKFILL_SIZE: int = 1000
+FEED_BATCH_SIZE: int = 500
+
+# Заголовок Server-Timing (core.middleware): view, БД, шаблоны, кэш.
+# Доля запросов, которые профилируются, период снятия стеков (с)
+# и каталог для файлов .folded
+SERVER_TIMING: bool = True
+PROFILE_SAMPLE_RATE: float = 0.0
+PROFILE_INTERVAL: float = 0.005
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Фоновые задачи (core.tasks, manage.py run_worker): попыток по
+# умолчанию, задержка первого повтора и наибольшая (с), срок аренды
+# задачи воркером (с). TASKS_EAGER — выполнять задачи сразу после
+# коммита в этом же процессе, без воркера
+TASK_MAX_ATTEMPTS: int = 5
+TASK_RETRY_DELAY: int = 10
+TASK_RETRY_MAX_DELAY: int = 3600
+TASK_LEASE: int = 300
+TASKS_EAGER: bool = False